@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException
-from passlib.context import CryptContext
 import jwt
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from sqlmodel import select
 
-from connection import get_session
+from cache import TTLCache
+from connection import async_session, get_session
 from models import User
+from password_hashing import get_password_hash, get_password_hash_async, verify_password, verify_password_async
 import os
 from dotenv import load_dotenv
 
@@ -17,11 +18,27 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# Кэш пользователей по email из токена (sub), чтобы не ходить в таблицу user на каждый запрос.
+# Кэш локален для процесса: в других воркерах запись устареет не позже чем через USER_CACHE_TTL секунд.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
+
 from fastapi.security import OAuth2PasswordBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login", scopes={})
 
 async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)):
+    return await authenticate(token, session)
+
+# Для долгих ответов (поток /events): сессия зависимости жила бы вместе с ответом
+# и держала соединение из пула, поэтому пользователь читается в короткой сессии
+async def get_streaming_user(token: str = Depends(oauth2_scheme)):
+    async with async_session() as session:
+        return await authenticate(token, session)
+
+async def authenticate(token: str, session: AsyncSession) -> User:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -29,14 +46,24 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSe
             raise HTTPException(status_code=401, detail="Неверные учетные данные")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Неверные учетные данные")
-    
+
+    # Из кэша отдаём отсоединённую от сессии копию: для изменений пользователя
+    # его нужно загрузить заново через session.get
+    cached = user_cache.get(email)
+    if cached is not None:
+        return User(**cached)
+
     query = select(User).where(User.email == email)
     result = await session.execute(query)
     user = result.scalars().first()
     if user is None:
         raise HTTPException(status_code=401, detail="Неверные учетные данные")
+    user_cache.set(email, user.model_dump())
     return user
 
+def invalidate_cached_user(email: str) -> None:
+    user_cache.invalidate(email)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -45,12 +72,4 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,22 @@
+from typing import List
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import insert
+
+# Пакетные эндпоинты (POST /tasks/batch, POST /time_logs/batch) принимают
+# не больше MAX_BATCH_SIZE элементов за запрос
+MAX_BATCH_SIZE = 1000
+
+def check_batch_size(size: int) -> None:
+    if size > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size must not exceed {MAX_BATCH_SIZE}")
+
+# Многострочный INSERT, id возвращаются в порядке строк. На SQLite с
+# sort_by_parameter_order SQLAlchemy вставляет строки по одной, поэтому там id
+# просто сортируются: rowid внутри одного INSERT растут в порядке строк
+async def insert_returning_ids(session: AsyncSession, model, rows: List[dict]) -> List[int]:
+    if session.bind.dialect.name == "sqlite":
+        result = await session.execute(insert(model).returning(model.id), rows)
+        return sorted(result.scalars().all())
+    result = await session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return result.scalars().all()
@@ -0,0 +1,106 @@
+# Сравнение числа обращений к базе при создании задачи: старый порядок
+# (commit, refresh, ещё один commit и перечитывание с тремя selectinload)
+# против текущего POST /tasks.
+#
+# Запуск из каталога lab1:
+#     python -m benchmarks.create_task_roundtrips
+# По умолчанию используется временная база SQLite (нужен aiosqlite);
+# чтобы замерить на Postgres, задайте DB_ADMIN.
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DB_ADMIN", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/roundtrips.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from auth_services import create_access_token
+from connection import async_session, engine, init_db
+from main import app
+from models import Category, Task, TaskCategory, User
+from password_hashing import get_password_hash
+
+class RoundTripCounter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def on_execute(self, *args):
+        self.statements += 1
+
+    def on_commit(self, *args):
+        self.commits += 1
+
+    @property
+    def round_trips(self) -> int:
+        return self.statements + self.commits
+
+    def __enter__(self):
+        self.statements = self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self.on_execute)
+        event.listen(engine.sync_engine, "commit", self.on_commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self.on_execute)
+        event.remove(engine.sync_engine, "commit", self.on_commit)
+
+async def legacy_create_task(user_id: int, title: str, category_ids: list) -> None:
+    async with async_session() as session:
+        task = Task(title=title, user_id=user_id)
+        session.add(task)
+        await session.commit()
+        await session.refresh(task)
+        result = await session.execute(select(Category).where(Category.id.in_(category_ids)))
+        for category in result.scalars().all():
+            session.add(TaskCategory(task_id=task.id, category_id=category.id))
+        await session.commit()
+        await session.execute(
+            select(Task)
+            .options(selectinload(Task.user), selectinload(Task.categories), selectinload(Task.time_logs))
+            .where(Task.id == task.id)
+        )
+
+async def main(iterations: int = 20) -> None:
+    await init_db()
+    async with async_session() as session:
+        user = User(name="bench", email="bench@example.com", hashed_password=get_password_hash("bench"))
+        categories = [Category(name=f"category-{i}") for i in range(3)]
+        session.add_all([user, *categories])
+        await session.commit()
+        category_ids = [category.id for category in categories]
+        user_id, email = user.id, user.email
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        # Прогрев кэша пользователя, чтобы считать только работу самого обработчика
+        await client.get("/tasks/", params={"limit": 1})
+
+        with RoundTripCounter() as legacy:
+            for i in range(iterations):
+                await legacy_create_task(user_id, f"legacy-{i}", category_ids)
+
+        with RoundTripCounter() as current:
+            for i in range(iterations):
+                response = await client.post("/tasks/", json={"title": f"current-{i}", "category_ids": category_ids})
+                response.raise_for_status()
+
+    print(f"{'variant':<10}{'statements':>12}{'commits':>10}{'round trips':>14}")
+    for name, counter in (("legacy", legacy), ("current", current)):
+        print(
+            f"{name:<10}{counter.statements / iterations:>12.1f}"
+            f"{counter.commits / iterations:>10.1f}{counter.round_trips / iterations:>14.1f}"
+        )
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
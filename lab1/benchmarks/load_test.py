@@ -0,0 +1,226 @@
+# Нагрузочный тест API: поднимает приложение из main.py в том же процессе,
+# заполняет базу синтетическими данными и параллельно гоняет запросы к основным
+# маршрутам через httpx. Для каждого маршрута печатает p50/p95/p99 и пропускную
+# способность и сравнивает их с сохранённым базовым прогоном.
+#
+# Запуск из каталога lab1:
+#     python -m benchmarks.load_test                      # сравнить с baseline.json
+#     python -m benchmarks.load_test --save-baseline      # записать новый baseline.json
+#     python -m benchmarks.load_test --users 20 --tasks-per-user 5000 --concurrency 32
+# По умолчанию используется временная база SQLite (нужен aiosqlite);
+# для замера на Postgres задайте DB_ADMIN на пустую базу.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DB_ADMIN", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/load_test.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import httpx
+from sqlmodel import insert, select
+
+from auth_services import create_access_token
+from connection import async_session, engine, init_db
+from main import app
+from models import Category, Priority, Task, TaskCategory, TaskTimeLog, User, tz
+from password_hashing import get_password_hash
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+WORDS = ["report", "meeting", "review", "deploy", "invoice", "design", "email", "backup", "release", "planning"]
+
+async def seed(users: int, tasks_per_user: int, categories: int, logs_per_task: int, rng: random.Random) -> list:
+    hashed_password = get_password_hash("benchmark")
+    start = datetime(2025, 1, 1, tzinfo=tz)
+    async with async_session() as session:
+        result = await session.execute(
+            insert(User).returning(User.id, User.email, sort_by_parameter_order=True),
+            [{"name": f"user-{i}", "email": f"user-{i}@example.com", "hashed_password": hashed_password} for i in range(users)],
+        )
+        accounts = result.all()
+        result = await session.execute(
+            insert(Category).returning(Category.id, sort_by_parameter_order=True),
+            [{"name": f"category-{i}"} for i in range(categories)],
+        )
+        category_ids = result.scalars().all()
+
+        for user_id, _ in accounts:
+            rows = [
+                {
+                    "user_id": user_id,
+                    "title": " ".join(rng.sample(WORDS, 3)),
+                    "description": " ".join(rng.choices(WORDS, k=8)),
+                    "priority": rng.choice(list(Priority)),
+                    "due_date": start + timedelta(days=rng.randint(0, 365)),
+                    "scheduled_datetime": start + timedelta(hours=rng.randint(0, 24 * 365)),
+                }
+                for _ in range(tasks_per_user)
+            ]
+            result = await session.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows)
+            task_ids = result.scalars().all()
+            links = [
+                {"task_id": task_id, "category_id": category_id}
+                for task_id in task_ids
+                for category_id in rng.sample(category_ids, min(2, len(category_ids)))
+            ]
+            if links:
+                await session.execute(insert(TaskCategory), links)
+            logs = []
+            for task_id in task_ids:
+                for _ in range(logs_per_task):
+                    log_start = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                    seconds = rng.randint(60, 4 * 3600)
+                    logs.append({
+                        "task_id": task_id,
+                        "user_id": user_id,
+                        "start_time": log_start,
+                        "end_time": log_start + timedelta(seconds=seconds),
+                        "time_spent": float(seconds),
+                    })
+            if logs:
+                await session.execute(insert(TaskTimeLog), logs)
+        await session.commit()
+    return [email for _, email in accounts]
+
+def routes(task_ids: list, rng: random.Random) -> dict:
+    return {
+        "GET /tasks/": lambda: ("GET", "/tasks/", {"params": {"limit": 50}}),
+        "GET /tasks/ filtered": lambda: (
+            "GET", "/tasks/", {"params": {"limit": 50, "priority": rng.randint(1, 3), "sort": "due_date", "include": "categories"}}
+        ),
+        "GET /tasks/{id}": lambda: ("GET", f"/tasks/{rng.choice(task_ids)}", {}),
+        "GET /tasks/search": lambda: ("GET", "/tasks/search", {"params": {"q": rng.choice(WORDS), "include": ""}}),
+        "GET /categories/": lambda: ("GET", "/categories/", {}),
+        "GET /reports/time": lambda: ("GET", "/reports/time", {"params": {"group_by": rng.choice(["task", "category", "day"])}}),
+        "POST /tasks/": lambda: ("POST", "/tasks/", {"json": {"title": rng.choice(WORDS), "category_ids": [1]}}),
+        "POST /tasks/{id}/time_logs": lambda: (
+            "POST", f"/tasks/{rng.choice(task_ids)}/time_logs",
+            {"json": {"start_time": "2025-06-01T10:00:00+00:00", "end_time": "2025-06-01T11:00:00+00:00"}},
+        ),
+    }
+
+def percentile(sorted_values: list, q: float) -> float:
+    index = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def run_route(client: httpx.AsyncClient, make_request, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in counter:
+            method, url, kwargs = make_request()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for route, current in results.items():
+        previous = baseline.get(route)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: rps {previous['rps']:.1f} -> {current['rps']:.1f}")
+    return regressions
+
+def print_table(results: dict, baseline: dict) -> None:
+    print(f"{'route':<30}{'reqs':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'p95 vs base':>14}")
+    for route, stats in results.items():
+        previous = baseline.get(route)
+        delta = f"{(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%" if previous and previous["p95_ms"] else "-"
+        print(
+            f"{route:<30}{stats['requests']:>7}{stats['errors']:>8}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['rps']:>10.1f}{delta:>14}"
+        )
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--tasks-per-user", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--logs-per-task", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=500, help="запросов на каждый маршрут")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--routes", help="маршруты через запятую (по умолчанию все)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение p95 и rps, доля")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    await init_db()
+    emails = await seed(args.users, args.tasks_per_user, args.categories, args.logs_per_task, rng)
+    async with async_session() as session:
+        user = (await session.execute(select(User).where(User.email == emails[0]))).scalars().first()
+        task_ids = (await session.execute(select(Task.id).where(Task.user_id == user.id))).scalars().all()
+
+    # Запросы идут от первого пользователя, остальные нужны как фон в таблицах
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://benchmark",
+        headers={"Authorization": f"Bearer {create_access_token({'sub': emails[0]})}"},
+    )
+
+    selected = routes(task_ids, rng)
+    if args.routes:
+        names = [name.strip() for name in args.routes.split(",")]
+        selected = {name: selected[name] for name in names}
+
+    results = {}
+    for name, make_request in selected.items():
+        results[name] = await run_route(client, make_request, args.requests, args.concurrency)
+    await client.aclose()
+    await engine.dispose()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"\nbaseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nregressions:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
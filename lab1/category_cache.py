@@ -0,0 +1,99 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+from dotenv import load_dotenv
+from connection import async_session, engine
+from models import CacheVersion, Category
+
+load_dotenv()
+
+# Как часто (в секундах) воркер сверяет свою версию кэша категорий с версией в базе
+CATEGORY_CACHE_CHECK_INTERVAL = float(os.getenv("CATEGORY_CACHE_CHECK_INTERVAL", "5"))
+
+# Категорий мало и меняются они редко, поэтому воркер держит их все в памяти.
+# Изменения категорий увеличивают версию в таблице cacheversion в той же транзакции,
+# остальные воркеры замечают это не позже чем через CATEGORY_CACHE_CHECK_INTERVAL секунд.
+class CategoryCache:
+    name = "category"
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.hits = 0
+        self.reloads = 0
+        self._categories: Optional[Dict[int, Category]] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    # force_check — сверить версию с базой, даже если интервал проверки не истёк
+    async def _load(self, session: AsyncSession, force_check: bool = False) -> Dict[int, Category]:
+        now = time.monotonic()
+        if not force_check and self._categories is not None and now - self._checked_at < self.check_interval:
+            self.hits += 1
+            return self._categories
+
+        # Кэш общий для всего процесса, поэтому версия и категории всегда читаются
+        # с основной базы: с отстающей реплики в него попал бы устаревший список,
+        # и запись задач на основной базе отбрасывала бы новые категории
+        if session.bind is not engine:
+            async with async_session() as primary:
+                return await self._reload(primary, now)
+        return await self._reload(session, now)
+
+    async def _reload(self, session: AsyncSession, now: float) -> Dict[int, Category]:
+        # Версию читаем раньше категорий: если между запросами кто-то изменит
+        # категории, при следующей проверке версия не совпадёт и кэш перечитается
+        version = await session.scalar(select(CacheVersion.version).where(CacheVersion.name == self.name)) or 0
+        if self._categories is None or version != self._version:
+            result = await session.execute(select(Category).order_by(Category.id))
+            self._categories = {category.id: Category(**category.model_dump()) for category in result.scalars().all()}
+            self._version = version
+            self.reloads += 1
+        else:
+            self.hits += 1
+        self._checked_at = now
+        return self._categories
+
+    async def all(self, session: AsyncSession) -> List[Category]:
+        return list((await self._load(session)).values())
+
+    async def get(self, session: AsyncSession, category_id: int) -> Optional[Category]:
+        return (await self._load(session)).get(category_id)
+
+    # Проверка категорий при записи задач. Здесь версия сверяется всегда (один SELECT
+    # строки cacheversion): иначе после изменений в другом воркере задача могла бы
+    # сослаться на удалённую категорию или не получить только что созданную
+    async def existing(self, session: AsyncSession, category_ids: Iterable[int]) -> List[Category]:
+        categories = await self._load(session, force_check=True)
+        return [categories[category_id] for category_id in dict.fromkeys(category_ids) if category_id in categories]
+
+    # Вызывается до commit в транзакции, которая меняет категории. Одним
+    # INSERT ... ON CONFLICT DO UPDATE: два первых писателя при отсутствии строки
+    # иначе оба делали бы INSERT, и один падал бы на первичном ключе
+    async def bump_version(self, session: AsyncSession) -> None:
+        dialect = session.bind.dialect.name
+        statement = (postgresql if dialect == "postgresql" else sqlite).insert(CacheVersion).values(name=self.name, version=1)
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CacheVersion.name],
+                set_={"version": CacheVersion.version + 1},
+            )
+        )
+
+    # Вызывается после commit, чтобы этот воркер сразу увидел изменения
+    def clear(self) -> None:
+        self._categories = None
+        self._version = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._categories) if self._categories is not None else 0,
+            "version": self._version,
+            "check_interval": self.check_interval,
+            "hits": self.hits,
+            "reloads": self.reloads,
+        }
+
+category_cache = CategoryCache(CATEGORY_CACHE_CHECK_INTERVAL)
@@ -1,26 +1,146 @@
 from sqlmodel import SQLModel
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
+import time
 from dotenv import load_dotenv
+from task_search import get_task_search
 
 load_dotenv()
 
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+def env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+
+    def record_acquire(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.acquire_seconds_total += seconds
+        self.acquire_seconds_max = max(self.acquire_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "acquire_seconds_total": self.acquire_seconds_total,
+            "acquire_seconds_avg": self.acquire_seconds_total / self.checkouts if self.checkouts else 0.0,
+            "acquire_seconds_max": self.acquire_seconds_max,
+        }
+
+pool_metrics = PoolMetrics()
+read_pool_metrics = PoolMetrics()
+
+# Пул, который замеряет, сколько запрос ждал соединение (включая открытие нового)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    metrics = pool_metrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.record_acquire(time.perf_counter() - start)
+
+class ReadTimedQueuePool(TimedQueuePool):
+    metrics = read_pool_metrics
+
+# Параметры пула читаются из переменных с префиксом prefix: DB_POOL_SIZE у основной
+# базы, DB_READ_POOL_SIZE у реплики и т. д.
+def engine_options(url: str, prefix: str = "DB", poolclass: type = TimedQueuePool) -> dict:
+    options = {"echo": env_bool(f"{prefix}_ECHO", False)}
+    # У SQLite свой пул, параметры очереди к нему не применяются
+    if url.startswith("sqlite"):
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=env_int(f"{prefix}_POOL_SIZE", 5),
+        max_overflow=env_int(f"{prefix}_MAX_OVERFLOW", 10),
+        pool_timeout=env_float(f"{prefix}_POOL_TIMEOUT", 30),
+        pool_recycle=env_int(f"{prefix}_POOL_RECYCLE", -1),
+        pool_pre_ping=env_bool(f"{prefix}_POOL_PRE_PING", True),
+    )
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"statement_cache_size": env_int(f"{prefix}_STATEMENT_CACHE_SIZE", 100)}
+    return options
+
 db_url = os.getenv('DB_ADMIN')
-engine = create_async_engine(db_url, echo=True)
+engine = create_async_engine(db_url, **engine_options(db_url))
+
+# Необязательная реплика только для чтения (DB_READ_REPLICA) со своим пулом.
+# Обработчики получают её сессию через read_routing.get_read_session
+read_db_url = os.getenv('DB_READ_REPLICA')
+read_engine = (
+    create_async_engine(read_db_url, **engine_options(read_db_url, "DB_READ", ReadTimedQueuePool))
+    if read_db_url else None
+)
+
+def engines() -> list:
+    return [engine] if read_engine is None else [engine, read_engine]
+
+def _count_connects(metrics: PoolMetrics):
+    def count_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+    return count_connect
+
+event.listen(engine.sync_engine.pool, "connect", _count_connects(pool_metrics))
+if read_engine is not None:
+    event.listen(read_engine.sync_engine.pool, "connect", _count_connects(read_pool_metrics))
 
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+read_session = (
+    sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    if read_engine is not None else None
+)
+
+def engine_pool_stats(target, metrics: PoolMetrics) -> dict:
+    pool = target.sync_engine.pool
+    stats = {"status": pool.status(), **metrics.snapshot()}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+def pool_stats() -> dict:
+    stats = engine_pool_stats(engine, pool_metrics)
+    if read_engine is not None:
+        stats["read_replica"] = engine_pool_stats(read_engine, read_pool_metrics)
+    return stats
+
+task_search = get_task_search(engine.dialect.name)
 
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
+        if task_search is not None:
+            await task_search.setup(conn)
 
 async def get_session():
     async with async_session() as session:
         yield session
 
 async def close_db():
-    await engine.dispose()
\ No newline at end of file
+    for target in engines():
+        await target.dispose()
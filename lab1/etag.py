@@ -0,0 +1,21 @@
+import hashlib
+from typing import Any
+from fastapi import Request, Response
+
+# Слабый ETag по дешёвому агрегату (число строк, время последнего изменения)
+# и строке запроса, так как от неё зависит содержимое ответа
+def weak_etag(request: Request, *parts: Any) -> str:
+    digest = hashlib.sha1(repr((request.url.path, request.url.query, *parts)).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
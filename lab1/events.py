@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import func, select
+from connection import db_url, engine, env_float, env_int
+
+# События об изменениях задач, записей времени и категорий для подписчиков /events.
+# EVENTS_BACKEND=postgres рассылает их через LISTEN/NOTIFY между всеми воркерами,
+# memory — только внутри процесса (тесты, SQLite, один воркер).
+# По умолчанию postgres выбирается для PostgreSQL, иначе memory
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "postgres" if engine.dialect.name == "postgresql" else "memory")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "task_events")
+EVENT_QUEUE_SIZE = env_int("EVENT_QUEUE_SIZE", 100)
+# Соединение LISTEN проверяется раз в EVENTS_LISTEN_CHECK_INTERVAL секунд; после
+# разрыва переподключение идёт с паузой, удваивающейся до EVENTS_RECONNECT_MAX_DELAY
+EVENTS_LISTEN_CHECK_INTERVAL = env_float("EVENTS_LISTEN_CHECK_INTERVAL", 30)
+EVENTS_RECONNECT_MAX_DELAY = env_float("EVENTS_RECONNECT_MAX_DELAY", 30)
+
+# user_id = None — событие для всех пользователей (категории общие)
+PENDING_EVENTS_KEY = "pending_events"
+
+logger = logging.getLogger("events")
+
+# Подписки клиентов этого процесса: у каждого соединения своя очередь
+class MemoryBroker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    # Медленный клиент не должен копить события бесконечно: при переполнении очередь
+    # очищается и клиент получает resync, после которого сам читает /tasks/changes
+    def deliver(self, user_id: Optional[int], payload: dict) -> None:
+        if user_id is None:
+            queues = [queue for user_queues in self._subscribers.values() for queue in user_queues]
+        else:
+            queues = list(self._subscribers.get(user_id, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    # Событие откладывается до коммита транзакции и пропадает при откате
+    async def publish(self, session: AsyncSession, user_id: Optional[int], payload: dict) -> None:
+        session.info.setdefault(PENDING_EVENTS_KEY, []).append((user_id, payload))
+
+    def flush_pending(self, pending: List[Tuple[Optional[int], dict]]) -> None:
+        for user_id, payload in pending:
+            self.deliver(user_id, payload)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+# pg_notify выполняется в транзакции обработчика, поэтому PostgreSQL доставляет
+# уведомление только после коммита. Каждый воркер слушает канал отдельным
+# соединением asyncpg и раздаёт события своим подписчикам. Соединение держит
+# фоновая задача: при разрыве она переподключается, а подписчики получают resync,
+# потому что уведомления за время разрыва потеряны
+class PostgresBroker(MemoryBroker):
+    def __init__(self, queue_size: int, dsn: str, channel: str,
+                 check_interval: float = EVENTS_LISTEN_CHECK_INTERVAL,
+                 max_delay: float = EVENTS_RECONNECT_MAX_DELAY):
+        super().__init__(queue_size)
+        self.dsn = dsn
+        self.channel = channel
+        self.check_interval = check_interval
+        self.max_delay = max_delay
+        self.reconnects = 0
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, session: AsyncSession, user_id: Optional[int], payload: dict) -> None:
+        message = json.dumps({"user_id": user_id, "event": payload}, separators=(",", ":"), default=str)
+        await session.execute(select(func.pg_notify(self.channel, message)))
+
+    def flush_pending(self, pending: List[Tuple[Optional[int], dict]]) -> None:
+        pass
+
+    def _on_notify(self, connection, pid: int, channel: str, message: str) -> None:
+        try:
+            data = json.loads(message)
+            self.deliver(data["user_id"], data["event"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("malformed event notification: %r", message)
+
+    async def _connect(self):
+        import asyncpg
+        return await asyncpg.connect(self.dsn)
+
+    # Ждёт разрыва: termination listener срабатывает, когда asyncpg заметил закрытие,
+    # а периодический SELECT 1 ловит соединения, оборвавшиеся молча
+    async def _wait_lost(self, connection) -> None:
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(connection.fetchval("SELECT 1"), timeout=self.check_interval)
+                except Exception:
+                    return
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        connected_before = False
+        while True:
+            try:
+                connection = await self._connect()
+                await connection.add_listener(self.channel, self._on_notify)
+            except Exception:
+                logger.warning("events listener cannot connect, retrying in %.0f s", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+                continue
+            self._connection = connection
+            delay = 1.0
+            if connected_before:
+                self.reconnects += 1
+                logger.warning("events listener reconnected")
+                self.deliver(None, {"type": "resync"})
+            connected_before = True
+            await self._wait_lost(connection)
+            logger.warning("events listener connection lost")
+            self._connection = None
+            connection.terminate()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="events-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+def make_broker(backend: str) -> MemoryBroker:
+    if backend == "memory":
+        return MemoryBroker(EVENT_QUEUE_SIZE)
+    if backend == "postgres":
+        return PostgresBroker(EVENT_QUEUE_SIZE, db_url.replace("postgresql+asyncpg://", "postgresql://", 1), EVENTS_CHANNEL)
+    raise ValueError(f"Неизвестный EVENTS_BACKEND: {backend}")
+
+broker = make_broker(EVENTS_BACKEND)
+
+@event.listens_for(Session, "after_commit")
+def _deliver_after_commit(session: Session) -> None:
+    pending = session.info.pop(PENDING_EVENTS_KEY, None)
+    if pending:
+        broker.flush_pending(pending)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+# Событие вида {"type": "task.updated", "ids": [1, 2], ...}: только что и где изменилось,
+# сами данные клиент забирает через GET /tasks/changes
+async def publish(session: AsyncSession, user_id: Optional[int], type: str, ids: Iterable[int], **extra: Any) -> None:
+    await broker.publish(session, user_id, {"type": type, "ids": list(ids), **extra})
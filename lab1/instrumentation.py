@@ -0,0 +1,130 @@
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import event
+from connection import engines, env_bool, env_float
+
+# Запросы дольше SLOW_REQUEST_MS пишутся в лог, REQUEST_METRICS=1 включает гистограммы по маршрутам
+SLOW_REQUEST_MS = env_float("SLOW_REQUEST_MS", 500)
+REQUEST_METRICS = env_bool("REQUEST_METRICS", False)
+
+logger = logging.getLogger("instrumentation")
+
+# Счётчики SQL для запроса или блока кода. Вложенные счётчики (например, бюджет
+# внутри запроса) передают выражения и родителю, а keep_sql сохраняет их текст
+class QueryStats:
+    def __init__(self, parent: Optional["QueryStats"] = None, keep_sql: bool = False):
+        self.parent = parent
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.sql = [] if keep_sql else None
+
+# Статистика SQL текущего запроса; события движка дописывают в неё число и время выражений
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started_at
+    stats = current_query_stats.get()
+    while stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        if stats.sql is not None:
+            stats.sql.append(statement)
+        stats = stats.parent
+
+# Считаются выражения и основной базы, и реплики для чтения
+for _engine in engines():
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = [f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# Гистограммы по (метод, маршрут) в текстовом формате Prometheus
+class RequestMetrics:
+    def __init__(self):
+        self.duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.db_duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+
+    def observe(self, method: str, route: str, seconds: float, stats: QueryStats) -> None:
+        key = (method, route)
+        self.duration[key].observe(seconds)
+        self.db_duration[key].observe(stats.db_seconds)
+        self.statements[key].observe(stats.statements)
+
+    def render(self) -> str:
+        lines = []
+        for name, histograms in (
+            ("http_request_duration_seconds", self.duration),
+            ("http_request_db_duration_seconds", self.db_duration),
+            ("http_request_db_statements", self.statements),
+        ):
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), histogram in sorted(histograms.items()):
+                lines += histogram.render(name, f'method="{method}",route="{route}"')
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
+
+# Шаблон маршрута вида /tasks/{task_id}. В некоторых версиях FastAPI route.path задан
+# относительно роутера, поэтому префикс берётся из фактического пути запроса
+def route_path(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    path = request.scope["path"]
+    cut = len(path)
+    for _ in range(route.path.count("/")):
+        cut = path.rfind("/", 0, cut)
+    return path[:cut] + route.path
+
+async def timing_middleware(request: Request, call_next):
+    stats = QueryStats(parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+    elapsed = time.perf_counter() - started
+
+    response.headers["Server-Timing"] = (
+        f'app;dur={elapsed * 1000:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries"'
+    )
+    route = route_path(request)
+    if elapsed * 1000 >= SLOW_REQUEST_MS:
+        logger.warning(
+            "slow request %s %s: %.1f ms, db %.1f ms, %d queries",
+            request.method, route, elapsed * 1000, stats.db_seconds * 1000, stats.statements,
+        )
+    if REQUEST_METRICS:
+        request_metrics.observe(request.method, route, elapsed, stats)
+    return response
@@ -0,0 +1,12 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+# Ответ, который сразу пишется в байты сериализатором pydantic-core (Rust).
+# Если обработчик возвращает его сам, FastAPI не проверяет данные повторно через
+# response_model и не гоняет их через jsonable_encoder и json.dumps, поэтому
+# содержимое должно быть уже готово: словари, списки, datetime, Enum.
+# response_model у маршрута остаётся только для документации OpenAPI
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -1,22 +1,51 @@
 from typing import List
 from fastapi import FastAPI
-from connection import init_db, close_db
+from connection import init_db, close_db, read_engine
+from password_hashing import shutdown_hash_executor
+from instrumentation import timing_middleware
+from query_budget import QUERY_BUDGET_DEBUG, query_budget_middleware
+from reminders import REMINDERS_ENABLED, reminder_worker
+from events import broker
+from sync import SYNC_PRUNE_ENABLED, tombstone_pruner
+from read_routing import sticky_write_middleware
 from contextlib import asynccontextmanager
 from routers.category_router import router as category_router
 from routers.users_router import router as user_router
 from routers.task_router import router as task_router
+from routers.report_router import router as report_router
+from routers.time_log_router import router as time_log_router
+from routers.metrics_router import router as metrics_router
+from routers.events_router import router as events_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await broker.start()
+    if REMINDERS_ENABLED:
+        reminder_worker.start()
+    if SYNC_PRUNE_ENABLED:
+        tombstone_pruner.start()
     yield
+    await tombstone_pruner.stop()
+    await reminder_worker.stop()
+    await broker.stop()
     await close_db()
+    shutdown_hash_executor()
 
 app = FastAPI(lifespan=lifespan)
+app.middleware("http")(timing_middleware)
+if QUERY_BUDGET_DEBUG:
+    app.middleware("http")(query_budget_middleware)
+if read_engine is not None:
+    app.middleware("http")(sticky_write_middleware)
 
 app.include_router(category_router, prefix="/categories", tags=["Categories"])
 app.include_router(user_router, prefix="/users", tags=["Users"])
 app.include_router(task_router, prefix="/tasks", tags=["Tasks"])
+app.include_router(time_log_router, prefix="/time_logs", tags=["Time logs"])
+app.include_router(report_router, prefix="/reports", tags=["Reports"])
+app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
+app.include_router(events_router, prefix="/events", tags=["Events"])
 
 @app.get("/")
 def hello():
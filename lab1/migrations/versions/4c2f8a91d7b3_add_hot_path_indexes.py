@@ -0,0 +1,36 @@
+"""add indexes for hot query paths
+
+Revision ID: 4c2f8a91d7b3
+Revises: 1daef0464e49
+Create Date: 2025-04-02 12:14:05.318204
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c2f8a91d7b3'
+down_revision: Union[str, None] = '1daef0464e49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+    op.create_index(op.f('ix_task_user_id'), 'task', ['user_id'], unique=False)
+    op.create_index(op.f('ix_tasktimelog_task_id'), 'tasktimelog', ['task_id'], unique=False)
+    op.create_index(op.f('ix_taskcategory_category_id'), 'taskcategory', ['category_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_taskcategory_category_id'), table_name='taskcategory')
+    op.drop_index(op.f('ix_tasktimelog_task_id'), table_name='tasktimelog')
+    op.drop_index(op.f('ix_task_user_id'), table_name='task')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
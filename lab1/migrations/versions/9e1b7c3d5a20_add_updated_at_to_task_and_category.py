@@ -0,0 +1,32 @@
+"""add updated_at to task and category
+
+Revision ID: 9e1b7c3d5a20
+Revises: 4c2f8a91d7b3
+Create Date: 2025-04-09 16:41:37.902115
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e1b7c3d5a20'
+down_revision: Union[str, None] = '4c2f8a91d7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column('category', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('category', 'updated_at')
+    op.drop_column('task', 'updated_at')
@@ -0,0 +1,39 @@
+"""add user_id to tasktimelog and one running timer per user
+
+Revision ID: a8e3c5f1d9b2
+Revises: f5c9a2d7b164
+Create Date: 2025-05-05 11:20:37.518406
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8e3c5f1d9b2'
+down_revision: Union[str, None] = 'f5c9a2d7b164'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasktimelog', sa.Column('user_id', sa.Integer(), nullable=True))
+    op.execute('UPDATE tasktimelog SET user_id = (SELECT task.user_id FROM task WHERE task.id = tasktimelog.task_id)')
+    op.alter_column('tasktimelog', 'user_id', nullable=False)
+    op.create_foreign_key('tasktimelog_user_id_fkey', 'tasktimelog', 'user', ['user_id'], ['id'])
+    op.create_index(
+        'ux_tasktimelog_user_id_running', 'tasktimelog', ['user_id'], unique=True,
+        postgresql_where=sa.text('end_time IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_tasktimelog_user_id_running', table_name='tasktimelog', postgresql_where=sa.text('end_time IS NULL'))
+    op.drop_constraint('tasktimelog_user_id_fkey', 'tasktimelog', type_='foreignkey')
+    op.drop_column('tasktimelog', 'user_id')
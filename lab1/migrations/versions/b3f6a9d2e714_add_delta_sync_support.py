@@ -0,0 +1,48 @@
+"""add updated_at to tasktimelog, tombstone table and sync indexes
+
+Revision ID: b3f6a9d2e714
+Revises: e7b2f4c9a1d5
+Create Date: 2025-05-15 13:47:09.265381
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6a9d2e714'
+down_revision: Union[str, None] = 'e7b2f4c9a1d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tasktimelog',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_task_user_id_updated_at', 'task', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_tasktimelog_user_id_updated_at', 'tasktimelog', ['user_id', 'updated_at'], unique=False)
+    op.create_table('tombstone',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstone_user_id_deleted_at', 'tombstone', ['user_id', 'deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tombstone_user_id_deleted_at', table_name='tombstone')
+    op.drop_table('tombstone')
+    op.drop_index('ix_tasktimelog_user_id_updated_at', table_name='tasktimelog')
+    op.drop_index('ix_task_user_id_updated_at', table_name='task')
+    op.drop_column('tasktimelog', 'updated_at')
@@ -0,0 +1,35 @@
+"""add cacheversion table
+
+Revision ID: b7d4e2f9c813
+Revises: 9e1b7c3d5a20
+Create Date: 2025-04-15 11:03:52.447190
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2f9c813'
+down_revision: Union[str, None] = '9e1b7c3d5a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cacheversion = op.create_table('cacheversion',
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cacheversion, [{'name': 'category', 'version': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cacheversion')
@@ -0,0 +1,51 @@
+"""add timerollup table with daily time totals
+
+Revision ID: c4d8e1a7f3b6
+Revises: a8e3c5f1d9b2
+Create Date: 2025-05-08 09:14:52.730518
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e1a7f3b6'
+down_revision: Union[str, None] = 'a8e3c5f1d9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('timerollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('seconds', sa.Float(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'category_id')
+    )
+    op.execute(
+        """
+        INSERT INTO timerollup (user_id, day, category_id, seconds, entries)
+        SELECT tasktimelog.user_id,
+               date(timezone('UTC', tasktimelog.start_time)),
+               coalesce(taskcategory.category_id, 0),
+               sum(tasktimelog.time_spent),
+               count(tasktimelog.id)
+        FROM tasktimelog
+        LEFT OUTER JOIN taskcategory ON taskcategory.task_id = tasktimelog.task_id
+        WHERE tasktimelog.end_time IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('timerollup')
@@ -0,0 +1,34 @@
+"""add composite indexes for task filters
+
+Revision ID: d3a6f1b8e425
+Revises: b7d4e2f9c813
+Create Date: 2025-04-21 14:27:10.581336
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a6f1b8e425'
+down_revision: Union[str, None] = 'b7d4e2f9c813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_task_user_id_due_date', 'task', ['user_id', 'due_date'], unique=False)
+    op.create_index('ix_task_user_id_priority', 'task', ['user_id', 'priority'], unique=False)
+    op.create_index('ix_task_user_id_scheduled_datetime', 'task', ['user_id', 'scheduled_datetime'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_user_id_scheduled_datetime', table_name='task')
+    op.drop_index('ix_task_user_id_priority', table_name='task')
+    op.drop_index('ix_task_user_id_due_date', table_name='task')
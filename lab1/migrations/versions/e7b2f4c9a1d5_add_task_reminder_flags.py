@@ -0,0 +1,46 @@
+"""add reminder flags and pending reminder indexes to task
+
+Revision ID: e7b2f4c9a1d5
+Revises: c4d8e1a7f3b6
+Create Date: 2025-05-12 16:03:28.941175
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2f4c9a1d5'
+down_revision: Union[str, None] = 'c4d8e1a7f3b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task', sa.Column('scheduled_reminded_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('task', sa.Column('due_reminded_at', sa.DateTime(timezone=True), nullable=True))
+    # Сроки, прошедшие до появления воркера, считаем уже напомненными, иначе первый
+    # проход разошлёт напоминания по всей истории
+    op.execute('UPDATE task SET scheduled_reminded_at = now() WHERE scheduled_datetime <= now()')
+    op.execute('UPDATE task SET due_reminded_at = now() WHERE due_date <= now()')
+    op.create_index(
+        'ix_task_scheduled_datetime_pending', 'task', ['scheduled_datetime'], unique=False,
+        postgresql_where=sa.text('scheduled_reminded_at IS NULL'),
+    )
+    op.create_index(
+        'ix_task_due_date_pending', 'task', ['due_date'], unique=False,
+        postgresql_where=sa.text('due_reminded_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_due_date_pending', table_name='task', postgresql_where=sa.text('due_reminded_at IS NULL'))
+    op.drop_index('ix_task_scheduled_datetime_pending', table_name='task', postgresql_where=sa.text('scheduled_reminded_at IS NULL'))
+    op.drop_column('task', 'due_reminded_at')
+    op.drop_column('task', 'scheduled_reminded_at')
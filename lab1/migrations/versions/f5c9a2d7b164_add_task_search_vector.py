@@ -0,0 +1,38 @@
+"""add full-text search vector to task
+
+Revision ID: f5c9a2d7b164
+Revises: d3a6f1b8e425
+Create Date: 2025-04-28 10:52:44.103927
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+from task_search import SEARCH_VECTOR_SQL
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c9a2d7b164'
+down_revision: Union[str, None] = 'd3a6f1b8e425'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Тот же DDL выполняет PostgresTaskSearch.setup из init_db при старте приложения,
+    # поэтому колонка и индекс могут уже существовать
+    op.execute(
+        f"ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_task_search_vector")
+    op.execute("ALTER TABLE task DROP COLUMN IF EXISTS search_vector")
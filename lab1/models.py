@@ -1,11 +1,18 @@
 from enum import Enum
-from sqlmodel import DateTime, SQLModel, Field, Relationship, Column
-from datetime import datetime
+from sqlmodel import DateTime, SQLModel, Field, Relationship, Column, Index, func, text
+from datetime import date, datetime
 from typing import List, Optional
 import pytz
 
 tz = pytz.UTC
 
+def utcnow() -> datetime:
+    return datetime.now(tz)
+
+# Время последнего изменения строки: по нему считаются ETag для условных GET
+def updated_at_column() -> Column:
+    return Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow, server_default=func.now())
+
 class Priority(Enum):
     high = 1
     medium = 2
@@ -17,12 +24,13 @@ class UserDefault(SQLModel):
 
 class User(UserDefault, table=True):
     id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    email: str = Field(unique=True, index=True)
     tasks: List["Task"] = Relationship(back_populates="user")
     hashed_password: str
 
 class TaskCategory(SQLModel, table=True):
     task_id: int = Field(foreign_key="task.id", primary_key=True)
-    category_id: int = Field(foreign_key="category.id", primary_key=True)
+    category_id: int = Field(foreign_key="category.id", primary_key=True, index=True)
 
 class CategoryDefault(SQLModel):
     name: str
@@ -30,6 +38,7 @@ class CategoryDefault(SQLModel):
 class Category(CategoryDefault, table=True):
     id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     name: str
+    updated_at: datetime = Field(default_factory=utcnow, sa_column=updated_at_column())
     tasks: List["Task"] = Relationship(back_populates="categories", link_model=TaskCategory)
 
 class TaskDefault(SQLModel):
@@ -40,8 +49,28 @@ class TaskDefault(SQLModel):
     priority: Priority = Priority.medium
 
 class Task(TaskDefault, table=True):
+    __table_args__ = (
+        Index("ix_task_user_id_due_date", "user_id", "due_date"),
+        Index("ix_task_user_id_priority", "user_id", "priority"),
+        Index("ix_task_user_id_scheduled_datetime", "user_id", "scheduled_datetime"),
+        # Дельта-синхронизация и ETag списка: изменения пользователя по времени
+        Index("ix_task_user_id_updated_at", "user_id", "updated_at"),
+        # Очередь напоминаний: только задачи, по которым напоминание ещё не отправлено
+        Index(
+            "ix_task_scheduled_datetime_pending", "scheduled_datetime",
+            postgresql_where=text("scheduled_reminded_at IS NULL"), sqlite_where=text("scheduled_reminded_at IS NULL"),
+        ),
+        Index(
+            "ix_task_due_date_pending", "due_date",
+            postgresql_where=text("due_reminded_at IS NULL"), sqlite_where=text("due_reminded_at IS NULL"),
+        ),
+    )
     id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
+    updated_at: datetime = Field(default_factory=utcnow, sa_column=updated_at_column())
+    # Когда воркер напоминаний забрал задачу; сбрасывается при смене срока
+    scheduled_reminded_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    due_reminded_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
     user: User = Relationship(back_populates="tasks")
     categories: List[Category] = Relationship(back_populates="tasks", link_model=TaskCategory)
     time_logs: List["TaskTimeLog"] = Relationship(back_populates="task")
@@ -51,7 +80,48 @@ class TaskTimeLogDefault(SQLModel):
     end_time: Optional[datetime] = Field(default=datetime.now().astimezone(tz), sa_column=Column(DateTime(timezone=True)))
 
 class TaskTimeLog(TaskTimeLogDefault, table=True):
+    # Запущенный таймер — запись без end_time; у пользователя он может быть только один
+    __table_args__ = (
+        Index(
+            "ux_tasktimelog_user_id_running", "user_id", unique=True,
+            postgresql_where=text("end_time IS NULL"), sqlite_where=text("end_time IS NULL"),
+        ),
+        Index("ix_tasktimelog_user_id_updated_at", "user_id", "updated_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
-    task_id: int = Field(foreign_key="task.id")
+    task_id: int = Field(foreign_key="task.id", index=True)
+    user_id: int = Field(foreign_key="user.id")
+    updated_at: datetime = Field(default_factory=utcnow, sa_column=updated_at_column())
     task: Task = Relationship(back_populates="time_logs")
     time_spent: float
+
+
+# Версии кэшей, общие для всех воркеров: запись увеличивает версию,
+# а воркеры сравнивают её со своей и перечитывают данные при расхождении
+class CacheVersion(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    version: int = 0
+
+
+# Дневные итоги по завершённым записям времени: (пользователь, день, категория).
+# category_id = 0 — задачи без категорий. Запись задачи с несколькими категориями
+# учитывается в каждой из них, как в отчёте /reports/time?group_by=category
+class TimeRollup(SQLModel, table=True):
+    user_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    category_id: int = Field(primary_key=True)
+    seconds: float = 0.0
+    entries: int = 0
+
+
+# Следы удалённых задач и записей времени для дельта-синхронизации: клиент узнаёт
+# из них, что строку нужно убрать у себя. entity — "task" или "time_log"
+class Tombstone(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_tombstone_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    user_id: int
+    entity: str
+    entity_id: int
+    deleted_at: datetime = Field(default_factory=utcnow, sa_column=Column(DateTime(timezone=True), nullable=False, default=utcnow))
@@ -0,0 +1,98 @@
+import logging
+from contextlib import contextmanager
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from connection import env_bool
+from instrumentation import QueryStats, current_query_stats, route_path
+
+# В режиме отладки (QUERY_BUDGET_DEBUG=1) запрос, выполнивший больше SQL-выражений,
+# чем указано для его маршрута, завершается ошибкой 500
+QUERY_BUDGET_DEBUG = env_bool("QUERY_BUDGET_DEBUG", False)
+
+# Число выражений на запрос при пустых кэшах пользователя и категорий.
+# Если обработчик стал делать больше запросов (например, ленивая подгрузка связей),
+# бюджет будет превышен и упадёт tests/test_query_budgets.py; осознанные изменения нужно отражать здесь.
+# Числа сняты с EVENTS_BACKEND=memory: на postgres каждая запись добавляет один pg_notify
+QUERY_BUDGETS = {
+    "POST /categories/": 3,
+    "GET /categories/": 2,
+    "GET /categories/{category_id}": 2,
+    "PUT /categories/{category_id}": 3,
+    "DELETE /categories/{category_id}": 7,
+    "POST /tasks/": 5,
+    "POST /tasks/batch": 5,
+    "GET /tasks/": 5,
+    "GET /tasks/search": 4,
+    "GET /tasks/changes": 5,
+    # Вместе с телом, которое читается после начала ответа в своей сессии:
+    # middleware видит только проверку пользователя, тест — все выражения
+    "GET /tasks/export": 4,
+    "GET /tasks/{task_id}": 4,
+    "PUT /tasks/{task_id}": 11,
+    "DELETE /tasks/{task_id}": 10,
+    "GET /tasks/{task_id}/time_summary": 3,
+    "POST /tasks/{task_id}/time_logs": 6,
+    "PUT /tasks/{task_id}/time_logs/{time_log_id}": 7,
+    "DELETE /tasks/{task_id}/time_logs/{time_log_id}": 8,
+    "POST /tasks/{task_id}/timer/start": 3,
+    "POST /tasks/{task_id}/timer/stop": 5,
+    "POST /time_logs/batch": 6,
+    "GET /reports/time": 2,
+    "GET /reports/timesheet": 4,
+    "POST /users/login": 1,
+    "POST /users/register": 1,
+    "PUT /users/change_password": 2,
+    "GET /users/": 1,
+    "GET /users/{user_id}": 1,
+    "GET /users/me": 1,
+    "PUT /users/me": 2,
+    "DELETE /users/me": 3,
+    # Поток событий: считается только подписка до начала ответа
+    "GET /events/": 1,
+    "GET /metrics/auth_cache": 0,
+    "GET /metrics/category_cache": 0,
+    "GET /metrics/pool": 0,
+    "GET /metrics/requests": 0,
+}
+
+logger = logging.getLogger("query_budget")
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, label: str, budget: int, stats: QueryStats):
+        self.label = label
+        self.budget = budget
+        self.stats = stats
+        message = f"{label}: {stats.statements} SQL statements, budget is {budget}"
+        if stats.sql:
+            message += "\n" + "\n".join(f"  {i}. {sql}" for i, sql in enumerate(stats.sql, 1))
+        super().__init__(message)
+
+# Считает выражения внутри блока и падает, если их больше max_statements:
+#     with query_budget(3):
+#         await client.get("/tasks/")
+@contextmanager
+def query_budget(max_statements: int, label: str = "block"):
+    stats = QueryStats(parent=current_query_stats.get(), keep_sql=True)
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+    if stats.statements > max_statements:
+        raise QueryBudgetExceeded(label, max_statements, stats)
+
+async def query_budget_middleware(request: Request, call_next):
+    stats = QueryStats(parent=current_query_stats.get(), keep_sql=True)
+    token = current_query_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+
+    label = f"{request.method} {route_path(request)}"
+    budget = QUERY_BUDGETS.get(label)
+    if budget is not None and stats.statements > budget:
+        error = QueryBudgetExceeded(label, budget, stats)
+        logger.error("%s", error)
+        return JSONResponse(status_code=500, content={"detail": str(error)})
+    return response
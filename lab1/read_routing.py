@@ -0,0 +1,53 @@
+import hashlib
+import math
+import time
+from typing import Optional
+from fastapi import Request
+from cache import TTLCache
+from connection import async_session, env_float, env_int, read_session
+
+# Чтение с реплики при настроенном DB_READ_REPLICA. После успешной записи клиент
+# DB_READ_STICKY_SECONDS секунд читает с основной базы, чтобы увидеть свои изменения,
+# пока реплика догоняет. Признак хранится в cookie (работает при любом воркере)
+# и в памяти процесса по заголовку Authorization для клиентов без cookie
+DB_READ_STICKY_SECONDS = env_float("DB_READ_STICKY_SECONDS", 5)
+STICKY_COOKIE = "read_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+recent_writers = TTLCache(maxsize=env_int("DB_READ_STICKY_CLIENTS", 10000), ttl=DB_READ_STICKY_SECONDS)
+
+def client_key(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha1(authorization.encode()).hexdigest()
+
+def reads_from_primary(request: Request) -> bool:
+    try:
+        if float(request.cookies.get(STICKY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    key = client_key(request)
+    return key is not None and recent_writers.get(key) is not None
+
+async def sticky_write_middleware(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400 and DB_READ_STICKY_SECONDS > 0:
+        key = client_key(request)
+        if key is not None:
+            recent_writers.set(key, True)
+        response.set_cookie(
+            STICKY_COOKIE,
+            f"{time.time() + DB_READ_STICKY_SECONDS:.3f}",
+            max_age=math.ceil(DB_READ_STICKY_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+# Сессия для обработчиков, которые только читают. Без реплики это та же основная база
+async def get_read_session(request: Request):
+    factory = async_session if read_session is None or reads_from_primary(request) else read_session
+    async with factory() as session:
+        yield session
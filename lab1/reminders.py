@@ -0,0 +1,150 @@
+import asyncio
+import importlib
+import logging
+import os
+from datetime import datetime
+from typing import List, Literal, Optional, Protocol
+from pydantic import BaseModel
+from sqlmodel import select, update
+from connection import async_session, env_bool, env_float, env_int
+from models import Task, tz, utcnow
+
+# Фоновый воркер напоминаний по due_date и scheduled_datetime.
+# REMINDERS_ENABLED — запускать ли его в lifespan, REMINDER_INTERVAL — пауза между
+# проходами в секундах, REMINDER_BATCH_SIZE — сколько задач забирается за раз,
+# REMINDER_SINK — куда отправлять: log, memory или путь вида package.module:ClassName
+REMINDERS_ENABLED = env_bool("REMINDERS_ENABLED", True)
+REMINDER_INTERVAL = env_float("REMINDER_INTERVAL", 30)
+REMINDER_BATCH_SIZE = env_int("REMINDER_BATCH_SIZE", 100)
+
+logger = logging.getLogger("reminders")
+
+class Reminder(BaseModel):
+    task_id: int
+    user_id: int
+    title: str
+    kind: Literal["due", "scheduled"]
+    at: datetime
+
+class ReminderSink(Protocol):
+    async def send(self, reminders: List[Reminder]) -> None: ...
+
+class LogReminderSink:
+    async def send(self, reminders: List[Reminder]) -> None:
+        for reminder in reminders:
+            logger.info("reminder: user %s, task %s (%s) %s at %s",
+                        reminder.user_id, reminder.task_id, reminder.title, reminder.kind, reminder.at.isoformat())
+
+# Складывает напоминания в список, чтобы их можно было проверить в тестах
+class MemoryReminderSink:
+    def __init__(self):
+        self.reminders: List[Reminder] = []
+
+    async def send(self, reminders: List[Reminder]) -> None:
+        self.reminders.extend(reminders)
+
+def make_sink(name: str) -> ReminderSink:
+    if name == "log":
+        return LogReminderSink()
+    if name == "memory":
+        return MemoryReminderSink()
+    module_name, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(f"Неизвестный REMINDER_SINK: {name}")
+    return getattr(importlib.import_module(module_name), attr)()
+
+# Срок и отметка об отправленном напоминании для каждого вида напоминаний
+REMINDER_KINDS = (
+    ("scheduled", Task.scheduled_datetime, Task.scheduled_reminded_at),
+    ("due", Task.due_date, Task.due_reminded_at),
+)
+
+class ReminderWorker:
+    def __init__(self, sink: ReminderSink, interval: float, batch_size: int):
+        self.sink = sink
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    # Забирает одну порцию наступивших сроков одним UPDATE ... RETURNING.
+    # FOR UPDATE SKIP LOCKED в подзапросе не даёт двум воркерам забрать одну задачу:
+    # строки, заблокированные соседом, просто пропускаются. updated_at не трогаем,
+    # отметка напоминания не меняет задачу для клиентов
+    async def claim(self, kind: str, due_column, flag_column) -> List[Reminder]:
+        now = utcnow()
+        pending = (
+            select(Task.id)
+            .where(due_column <= now, flag_column.is_(None))
+            .order_by(due_column)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with async_session() as session:
+            result = await session.execute(
+                update(Task)
+                .where(Task.id.in_(pending.scalar_subquery()))
+                .values({flag_column: now, Task.updated_at: Task.updated_at})
+                .returning(Task.id, Task.user_id, Task.title, due_column)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await session.commit()
+        # SQLite отдаёт время без часового пояса, хранится оно в UTC
+        return [
+            Reminder(task_id=row[0], user_id=row[1], title=row[2], kind=kind,
+                     at=row[3] if row[3].tzinfo else row[3].replace(tzinfo=tz))
+            for row in rows
+        ]
+
+    # Если отправка не удалась, задачи возвращаются в очередь до следующего прохода
+    async def release(self, flag_column, reminders: List[Reminder]) -> None:
+        async with async_session() as session:
+            await session.execute(
+                update(Task)
+                .where(Task.id.in_([reminder.task_id for reminder in reminders]))
+                .values({flag_column: None, Task.updated_at: Task.updated_at})
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    # Один проход: порции забираются, пока очередь не опустеет. Возвращает число напоминаний
+    async def run_once(self) -> int:
+        sent = 0
+        for kind, due_column, flag_column in REMINDER_KINDS:
+            while True:
+                reminders = await self.claim(kind, due_column, flag_column)
+                if not reminders:
+                    break
+                try:
+                    await self.sink.send(reminders)
+                except Exception:
+                    logger.exception("reminder sink failed, %d %s reminders will be retried", len(reminders), kind)
+                    await self.release(flag_column, reminders)
+                    break
+                sent += len(reminders)
+                if len(reminders) < self.batch_size:
+                    break
+        return sent
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("reminder pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="reminder-worker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+reminder_worker = ReminderWorker(make_sink(os.getenv("REMINDER_SINK", "log")), REMINDER_INTERVAL, REMINDER_BATCH_SIZE)
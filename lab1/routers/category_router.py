@@ -1,12 +1,16 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import delete, select, update
 from connection import get_session
 from auth_services import get_current_user
-from models import CategoryDefault, Category, User
+from models import CategoryDefault, Category, Task, TaskCategory, TaskTimeLog, User, utcnow
 from typing_extensions import TypedDict
 from base_responses import MessageResponse
+from etag import etag_matches, not_modified, weak_etag
+from category_cache import category_cache
+import time_rollup
+import events
 
 router = APIRouter()
 
@@ -23,21 +27,29 @@ async def categories_create(category: CategoryDefault,
                             session: AsyncSession = Depends(get_session)) -> CategoryResponse:
     category = Category.model_validate(category)
     session.add(category)
+    await category_cache.bump_version(session)
+    await events.publish(session, None, "category.created", [category.id])
     await session.commit()
-    await session.refresh(category)
+    category_cache.clear()
     return {"status": 200, "data": category}
 
 # Получение списка категорий
 @router.get("/", response_model=CategoriesListResponse)
-async def get_categories(session: AsyncSession = Depends(get_session)) -> CategoriesListResponse:
-    categories = await session.execute(select(Category))
-    return {"status": 200, "data": categories.scalars().all()}
+async def get_categories(request: Request,
+                         response: Response,
+                         session: AsyncSession = Depends(get_session)) -> CategoriesListResponse:
+    categories = await category_cache.all(session)
+    etag = weak_etag(request, len(categories), max((category.updated_at for category in categories), default=None))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return {"status": 200, "data": categories}
 
 # Получение категории по ID
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(category_id: int, 
                        session: AsyncSession = Depends(get_session)) -> CategoryResponse:
-    category = await session.get(Category, category_id)
+    category = await category_cache.get(session, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return {"status": 200, "data": category}
@@ -52,17 +64,40 @@ async def update_category(category_id: int,
         raise HTTPException(status_code=404, detail="Category not found")
     for key, value in category_data.dict().items():
         setattr(category, key, value)
+    await category_cache.bump_version(session)
+    await events.publish(session, None, "category.updated", [category.id])
     await session.commit()
-    await session.refresh(category)
+    category_cache.clear()
     return {"status": 200, "data": category}
 
 # Удаление категории
 @router.delete("/{category_id}")
 async def delete_category(category_id: int, 
                           session: AsyncSession = Depends(get_session)) -> MessageResponse:
-    category = await session.get(Category, category_id)
-    if not category:
+    # Пакетные DELETE вместо session.delete: иначе ради связей подгружаются все задачи категории
+    # Дневные итоги затронутых пользователей пересчитываются: записи задач, у которых
+    # других категорий нет, должны перейти в строку «без категории»
+    result = await session.execute(
+        select(TaskTimeLog.user_id).distinct()
+        .join(TaskCategory, TaskCategory.task_id == TaskTimeLog.task_id)
+        .where(TaskCategory.category_id == category_id)
+    )
+    user_ids = result.scalars().all()
+    # У задач меняется список категорий, синхронизация должна их переотдать
+    await session.execute(
+        update(Task)
+        .where(Task.id.in_(select(TaskCategory.task_id).where(TaskCategory.category_id == category_id)))
+        .values(updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(delete(TaskCategory).where(TaskCategory.category_id == category_id))
+    result = await session.execute(delete(Category).where(Category.id == category_id))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Category not found")
-    await session.delete(category)
+    if user_ids:
+        await time_rollup.rebuild(session, user_ids)
+    await category_cache.bump_version(session)
+    await events.publish(session, None, "category.deleted", [category_id])
     await session.commit()
+    category_cache.clear()
     return {"status": 200, "message": "Category deleted"}
\ No newline at end of file
@@ -0,0 +1,41 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from auth_services import get_streaming_user
+from connection import env_float
+from events import broker
+from models import User
+
+router = APIRouter()
+
+# Если событий нет, раз в EVENTS_KEEPALIVE секунд уходит комментарий, чтобы
+# прокси не закрывали соединение и разрыв со стороны клиента был замечен
+EVENTS_KEEPALIVE = env_float("EVENTS_KEEPALIVE", 15)
+
+# Server-Sent Events: события об изменениях задач, записей времени и категорий
+# текущего пользователя. После resync или переподключения клиент догоняет
+# пропущенное через GET /tasks/changes
+@router.get("/")
+async def stream_events(request: Request, current_user: User = Depends(get_streaming_user)) -> StreamingResponse:
+    user_id = current_user.id
+    queue = broker.subscribe(user_id)
+
+    async def stream():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {payload['type']}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+        finally:
+            broker.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
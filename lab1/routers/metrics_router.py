@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing_extensions import TypedDict
+from auth_services import user_cache
+from connection import pool_stats
+from category_cache import category_cache
+from instrumentation import REQUEST_METRICS, request_metrics
+
+router = APIRouter()
+
+class CacheStatsResponse(TypedDict):
+    status: int
+    data: dict
+
+class PoolStatsResponse(TypedDict):
+    status: int
+    data: dict
+
+# Счётчики попаданий и промахов кэша пользователей
+@router.get("/auth_cache", response_model=CacheStatsResponse)
+async def get_auth_cache_stats() -> CacheStatsResponse:
+    return {"status": 200, "data": user_cache.stats()}
+
+# Состояние кэша категорий: версия, попадания и перечитывания
+@router.get("/category_cache", response_model=CacheStatsResponse)
+async def get_category_cache_stats() -> CacheStatsResponse:
+    return {"status": 200, "data": category_cache.stats()}
+
+# Состояние пула соединений: занятые/свободные соединения и время ожидания
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats() -> PoolStatsResponse:
+    return {"status": 200, "data": pool_stats()}
+
+# Гистограммы времени запроса, времени в базе и числа SQL-выражений по маршрутам
+@router.get("/requests", response_class=PlainTextResponse)
+async def get_request_metrics() -> PlainTextResponse:
+    if not REQUEST_METRICS:
+        raise HTTPException(status_code=404, detail="Request metrics are disabled")
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
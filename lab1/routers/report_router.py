@@ -0,0 +1,111 @@
+from datetime import date, datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from read_routing import get_read_session
+from auth_services import get_current_user
+from models import Category, Task, TaskCategory, TaskTimeLog, TimeRollup, User
+from category_cache import category_cache
+from pydantic import BaseModel
+from typing_extensions import TypedDict
+from time_services import TimeReportRow, to_utc, user_time_logs_query, utc_day
+
+router = APIRouter()
+
+MAX_TIMESHEET_DAYS = 366
+
+class TimesheetRow(BaseModel):
+    day: date
+    category_id: Optional[int] = None
+    label: Optional[str] = None
+    total_seconds: float
+    entries: int
+
+class TimesheetResponse(TypedDict):
+    status: int
+    data: List[TimesheetRow]
+
+class TimeReportResponse(TypedDict):
+    status: int
+    data: List[TimeReportRow]
+
+# Отчёт по затраченному времени с группировкой по задаче, категории или дню
+@router.get("/time", response_model=TimeReportResponse)
+async def time_report(group_by: Literal["task", "category", "day"] = "task",
+                      date_from: Optional[datetime] = None,
+                      date_to: Optional[datetime] = None,
+                      current_user: User = Depends(get_current_user),
+                      session: AsyncSession = Depends(get_read_session)) -> TimeReportResponse:
+    if group_by == "task":
+        group_columns = (Task.id, Task.title)
+        query = user_time_logs_query(current_user.id, *group_columns)
+    elif group_by == "category":
+        group_columns = (Category.id, Category.name)
+        # Записи задач без категорий попадают в строку с key = null, как в табеле
+        query = (
+            user_time_logs_query(current_user.id, *group_columns)
+            .outerjoin(TaskCategory, TaskCategory.task_id == Task.id)
+            .outerjoin(Category, Category.id == TaskCategory.category_id)
+        )
+    else:
+        # День по UTC, как в дневных итогах табеля
+        group_columns = (utc_day(TaskTimeLog.start_time, session.bind.dialect.name),)
+        query = user_time_logs_query(current_user.id, *group_columns)
+
+    if date_from:
+        query = query.where(TaskTimeLog.start_time >= to_utc(date_from))
+    if date_to:
+        query = query.where(TaskTimeLog.start_time < to_utc(date_to))
+
+    result = await session.execute(query.group_by(*group_columns).order_by(group_columns[0].nulls_last()))
+    rows = [
+        TimeReportRow(
+            key=None if row[0] is None else str(row[0]),
+            label=row[1] if len(group_columns) > 1 else None,
+            total_seconds=row.total_seconds,
+            entries=row.entries,
+            first_start=row.first_start,
+            last_end=row.last_end,
+        )
+        for row in result.all()
+    ]
+    return {"status": 200, "data": rows}
+
+
+# Табель за период [from, to] по дням и категориям. Читается из дневных итогов
+# timerollup, поэтому стоимость зависит от числа дней, а не от числа записей времени.
+# Записи задач без категорий попадают в строку с category_id = null
+@router.get("/timesheet", response_model=TimesheetResponse)
+async def timesheet(date_from: date = Query(alias="from"),
+                    date_to: date = Query(alias="to"),
+                    current_user: User = Depends(get_current_user),
+                    session: AsyncSession = Depends(get_read_session)) -> TimesheetResponse:
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be earlier than 'from'")
+    if (date_to - date_from).days >= MAX_TIMESHEET_DAYS:
+        raise HTTPException(status_code=400, detail=f"Period must not exceed {MAX_TIMESHEET_DAYS} days")
+
+    result = await session.execute(
+        select(TimeRollup.day, TimeRollup.category_id, TimeRollup.seconds, TimeRollup.entries)
+        .where(
+            TimeRollup.user_id == current_user.id,
+            TimeRollup.day >= date_from,
+            TimeRollup.day <= date_to,
+            TimeRollup.entries > 0,
+        )
+        .order_by(TimeRollup.day, TimeRollup.category_id)
+    )
+    rows = result.all()
+    labels = {category.id: category.name for category in await category_cache.all(session)} if rows else {}
+    data = [
+        TimesheetRow(
+            day=day,
+            category_id=category_id or None,
+            label=labels.get(category_id),
+            total_seconds=seconds,
+            entries=entries,
+        )
+        for day, category_id, seconds, entries in rows
+    ]
+    return {"status": 200, "data": data}
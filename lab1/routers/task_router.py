@@ -1,15 +1,28 @@
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import delete, select
-from connection import get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import and_, case, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from connection import async_session, get_session, task_search
+from read_routing import get_read_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing_extensions import TypedDict
 from base_responses import MessageResponse
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel
-from auth_services import get_current_user
-from models import Task, TaskCategory, TaskDefault, TaskTimeLogDefault,TaskTimeLog, Priority, User, Category
-from sqlalchemy.orm import selectinload
+from pydantic_core import to_json
+from auth_services import get_current_user, get_streaming_user
+from models import Task, TaskCategory, TaskDefault, TaskTimeLogDefault,TaskTimeLog, Priority, Tombstone, User, Category, utcnow
+from etag import etag_matches, not_modified, weak_etag
+from json_response import FastJSONResponse
+from category_cache import category_cache
+from sqlalchemy.orm import load_only, selectinload
+from batching import check_batch_size, insert_returning_ids
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from time_services import TimeSummary, seconds_between, to_utc, user_time_logs_query
+import time_rollup
+import events
+from sync import changes_query, decode_sync_cursor, encode_sync_cursor, sync_upper_bound, tombstone_task
 import pytz
 tz = pytz.UTC
 
@@ -19,6 +32,17 @@ class TaskModel(TaskDefault):
     categories: List[Category] = None
     time_logs: List[TaskTimeLog] = None
 
+# Модель для чтения с ?fields= и ?include=: в ответ попадают только запрошенные поля
+class TaskReadModel(BaseModel):
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    due_date: Optional[datetime] = None
+    scheduled_datetime: Optional[datetime] = None
+    priority: Optional[Priority] = None
+    categories: Optional[List[Category]] = None
+    time_logs: Optional[List[TaskTimeLog]] = None
+
 class TaskCreate(TaskDefault):
     category_ids: Optional[List[int]] = []
 
@@ -26,75 +50,403 @@ class TaskResponse(TypedDict):
     status: int
     data: TaskModel
 
+class TaskReadResponse(TypedDict):
+    status: int
+    data: TaskReadModel
+
+class TaskSearchResponse(TypedDict):
+    status: int
+    data: List[TaskReadModel]
+    next_offset: Optional[int]
+
+class TaskBatchResponse(TypedDict):
+    status: int
+    data: List[int]
+
 class TaskListResponse(TypedDict):
     status: int
-    data: List[TaskModel]
+    data: List[TaskReadModel]
+    next_cursor: Optional[str]
+
+class TaskChangeModel(TaskDefault):
+    id: int
+    category_ids: List[int]
+    updated_at: datetime
+
+class DeletedRowModel(BaseModel):
+    entity: Literal["task", "time_log"]
+    id: int
+    deleted_at: datetime
+
+class TaskChangesResponse(TypedDict):
+    status: int
+    tasks: List[TaskChangeModel]
+    time_logs: List[TaskTimeLog]
+    deleted: List[DeletedRowModel]
+    next_cursor: str
+    has_more: bool
 
 router = APIRouter()
 
+EXPORT_BATCH_SIZE = 500
+
+TASK_FIELDS = ("id", "title", "description", "due_date", "scheduled_datetime", "priority")
+TASK_RELATIONS = ("categories", "time_logs")
+
+def parse_csv(value: Optional[str], allowed: tuple, name: str) -> List[str]:
+    if value is None:
+        return list(allowed)
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {name}: {', '.join(unknown)}")
+    return list(dict.fromkeys(items))
+
+# id и поле сортировки нужны всегда: по ним строится курсор и подгружаются связи
+def task_read_options(fields: List[str], include: List[str], sort_field: str = "id") -> list:
+    options = [load_only(*(getattr(Task, field) for field in dict.fromkeys(["id", sort_field, *fields])))]
+    options += [selectinload(getattr(Task, relation)) for relation in include]
+    return options
+
+TaskSort = Literal["id", "-id", "due_date", "-due_date", "priority", "-priority"]
+
+def parse_between(value: Optional[str], name: str) -> Optional[tuple]:
+    if value is None:
+        return None
+    try:
+        start, end = (datetime.fromisoformat(part.strip()) for part in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be two ISO datetimes separated by a comma")
+    return to_utc(start), to_utc(end)
+
+# Выражение, по которому сортируется поле. PostgreSQL сравнивает priority в порядке
+# объявления enum (high, medium, low); SQLite хранит имена строкой, и сравнение шло бы
+# по алфавиту, поэтому там сортировка идёт по рангу из case()
+def task_sort_column(sort: str, dialect: str):
+    column = getattr(Task, sort.lstrip("-"))
+    if column is Task.priority and dialect != "postgresql":
+        return case({priority.name: priority.value for priority in Priority}, value=Task.priority)
+    return column
+
+# Порядок: поле сортировки (NULL в конце), затем id
+def task_order_by(sort: str, dialect: str) -> list:
+    descending = sort.startswith("-")
+    column = task_sort_column(sort, dialect)
+    id_order = Task.id.desc() if descending else Task.id.asc()
+    if column is Task.id:
+        return [id_order]
+    return [(column.desc() if descending else column.asc()).nulls_last(), id_order]
+
+def task_cursor_value(task: Task, sort: str):
+    value = getattr(task, sort.lstrip("-"))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Priority):
+        return value.name
+    return value
+
+# Условие «строго после курсора» для порядка из task_order_by
+def task_keyset_after(cursor: str, sort: str, dialect: str):
+    values = decode_cursor(cursor)
+    if len(values) != 3 or values[0] != sort or not isinstance(values[2], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    _, value, last_id = values
+    descending = sort.startswith("-")
+    column = task_sort_column(sort, dialect)
+    id_after = Task.id < last_id if descending else Task.id > last_id
+    if column is Task.id:
+        return id_after
+    if value is None:
+        return and_(column.is_(None), id_after)
+    try:
+        if sort.lstrip("-") == "priority":
+            value = Priority[value] if column is Task.priority else Priority[value].value
+        else:
+            value = to_utc(datetime.fromisoformat(value))
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    column_after = column < value if descending else column > value
+    return or_(column_after, and_(column == value, id_after), column.is_(None))
+
+# Список задач зависит и от самих задач пользователя, и от названий категорий
+async def tasks_etag_parts(session: AsyncSession, user_id: int) -> tuple:
+    result = await session.execute(
+        select(
+            select(func.count(Task.id)).where(Task.user_id == user_id).scalar_subquery(),
+            select(func.max(Task.updated_at)).where(Task.user_id == user_id).scalar_subquery(),
+            select(func.count(Category.id)).scalar_subquery(),
+            select(func.max(Category.updated_at)).scalar_subquery(),
+        )
+    )
+    return tuple(result.one())
+
+def task_to_dict(task: Task, fields: List[str], include: List[str]) -> dict:
+    data = {field: getattr(task, field) for field in fields}
+    for relation in include:
+        data[relation] = [item.model_dump() for item in getattr(task, relation)]
+    return data
+
+# Задача и связи с категориями пишутся в одной транзакции, ответ собирается
+# из переданных данных и кэша категорий без перечитывания задачи
 @router.post("/", response_model=TaskResponse)
 async def create_task(task_data: TaskCreate, 
                       current_user: User = Depends(get_current_user),
                       session: AsyncSession = Depends(get_session)) -> TaskResponse:
-    if task_data.due_date and task_data.due_date.tzinfo is None:
-        task_data.due_date = task_data.due_date.replace(tzinfo=tz)
+    values = task_data.model_dump(exclude={"category_ids"})
+    values["due_date"] = to_utc(values["due_date"])
+    values["scheduled_datetime"] = to_utc(values["scheduled_datetime"])
 
-    if task_data.scheduled_datetime and task_data.scheduled_datetime.tzinfo is None:
-        task_data.scheduled_datetime = task_data.scheduled_datetime.replace(tzinfo=tz)
-
-    task = Task(**task_data.model_dump(), user_id=current_user.id)
-    session.add(task)
-    await session.commit()
-    await session.refresh(task)
+    result = await session.execute(
+        insert(Task).values(**values, user_id=current_user.id).returning(Task.id)
+    )
+    task_id = result.scalar_one()
 
+    categories = []
     if task_data.category_ids:
-        categories_result = await session.execute(
-            select(Category).where(Category.id.in_(task_data.category_ids))
+        categories = await category_cache.existing(session, task_data.category_ids)
+    if categories:
+        await session.execute(
+            insert(TaskCategory),
+            [{"task_id": task_id, "category_id": category.id} for category in categories],
         )
-        categories = categories_result.scalars().all()
-        for category in categories:
-            task_category = TaskCategory(task_id=task.id, category_id=category.id)
-            session.add(task_category)
+    await events.publish(session, current_user.id, "task.created", [task_id])
     await session.commit()
 
+    return {"status": 200, "data": TaskModel(id=task_id, **values, categories=categories, time_logs=[])}
+
+
+# Пакетное создание задач: одна проверка категорий, многострочные INSERT и одна транзакция
+@router.post("/batch", response_model=TaskBatchResponse)
+async def create_tasks_batch(tasks_data: List[TaskCreate],
+                             current_user: User = Depends(get_current_user),
+                             session: AsyncSession = Depends(get_session)) -> TaskBatchResponse:
+    if not tasks_data:
+        return {"status": 200, "data": []}
+    check_batch_size(len(tasks_data))
+
+    category_ids = {category_id for task_data in tasks_data for category_id in task_data.category_ids or []}
+    if category_ids:
+        categories = await category_cache.existing(session, category_ids)
+        missing = category_ids - {category.id for category in categories}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Categories not found: {sorted(missing)}")
+
+    rows = []
+    for task_data in tasks_data:
+        row = task_data.model_dump(exclude={"category_ids"})
+        row["due_date"] = to_utc(row["due_date"])
+        row["scheduled_datetime"] = to_utc(row["scheduled_datetime"])
+        rows.append({**row, "user_id": current_user.id})
+
+    task_ids = await insert_returning_ids(session, Task, rows)
+
+    links = [
+        {"task_id": task_id, "category_id": category_id}
+        for task_id, task_data in zip(task_ids, tasks_data)
+        for category_id in dict.fromkeys(task_data.category_ids or [])
+    ]
+    if links:
+        await session.execute(insert(TaskCategory), links)
+    await events.publish(session, current_user.id, "task.created", task_ids)
+    await session.commit()
+
+    return {"status": 200, "data": task_ids}
+
+
+@router.get("/", response_model=TaskListResponse, response_model_exclude_unset=True)
+async def get_all_tasks(request: Request,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        after: Optional[str] = None,
+                        fields: Optional[str] = None,
+                        include: Optional[str] = None,
+                        priority: Optional[int] = Query(None, ge=Priority.high.value, le=Priority.low.value),
+                        due_before: Optional[datetime] = None,
+                        due_after: Optional[datetime] = None,
+                        scheduled_between: Optional[str] = None,
+                        category_id: Optional[int] = None,
+                        sort: TaskSort = "id",
+                        current_user: User = Depends(get_current_user), 
+                        session: AsyncSession = Depends(get_read_session)) -> TaskListResponse:
+    fields = parse_csv(fields, TASK_FIELDS, "fields")
+    include = parse_csv(include, TASK_RELATIONS, "include")
+    scheduled_between = parse_between(scheduled_between, "scheduled_between")
+
+    etag = weak_etag(request, current_user.id, *await tasks_etag_parts(session, current_user.id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Фильтры ложатся на составные индексы (user_id, due_date), (user_id, priority)
+    # и (user_id, scheduled_datetime)
+    query = select(Task).where(Task.user_id == current_user.id)
+    if priority is not None:
+        query = query.where(Task.priority == Priority(priority))
+    if due_before is not None:
+        query = query.where(Task.due_date < to_utc(due_before))
+    if due_after is not None:
+        query = query.where(Task.due_date >= to_utc(due_after))
+    if scheduled_between is not None:
+        query = query.where(Task.scheduled_datetime >= scheduled_between[0], Task.scheduled_datetime < scheduled_between[1])
+    if category_id is not None:
+        query = query.where(Task.id.in_(select(TaskCategory.task_id).where(TaskCategory.category_id == category_id)))
+    if after is not None:
+        query = query.where(task_keyset_after(after, sort, session.bind.dialect.name))
+
+    # Берём на одну строку больше, чтобы понять, есть ли следующая страница.
+    # selectinload подгружает связи только для задач этой страницы.
     result = await session.execute(
-        select(Task)
-        .options(selectinload(Task.user), selectinload(Task.categories), selectinload(Task.time_logs))
-        .where(Task.id == task.id)
+        query
+        .order_by(*task_order_by(sort, session.bind.dialect.name))
+        .limit(limit + 1)
+        .options(*task_read_options(fields, include, sort.lstrip("-")))
+    )
+    tasks = result.scalars().all()
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(sort, task_cursor_value(tasks[-1], sort), tasks[-1].id)
+    # Данные собраны из ORM и уже в нужной форме, поэтому сериализуются без повторной проверки
+    return FastJSONResponse(
+        {"status": 200, "data": [task_to_dict(task, fields, include) for task in tasks], "next_cursor": next_cursor},
+        headers={"ETag": etag},
     )
-    task_with_relations = result.scalars().first()
-    task_with_relations_dict = TaskModel.model_validate(task_with_relations)
 
-    if task_with_relations_dict:
-        return {"status": 200, "data": task_with_relations_dict}
-    else:
-        raise HTTPException(status_code=404, detail="Task not found")
 
+# Дельта-синхронизация: задачи, записи времени и удаления пользователя, изменившиеся
+# после курсора since. У каждого источника своя позиция (updated_at, id) в курсоре,
+# каждый читается по индексу (user_id, updated_at) не больше limit строк. Без since
+# отдаётся всё с начала. Пока has_more, клиент запрашивает дальше с next_cursor,
+# затем сохраняет его до следующей синхронизации. На курсор старше срока хранения
+# следов удалений приходит 410, и клиент синхронизируется заново без since
+@router.get("/changes", response_model=TaskChangesResponse)
+async def get_task_changes(since: Optional[str] = None,
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                           current_user: User = Depends(get_current_user),
+                           session: AsyncSession = Depends(get_session)) -> TaskChangesResponse:
+    synced_at, positions = decode_sync_cursor(since)
+    upper = sync_upper_bound()
+    sources = (
+        (Task, Task.user_id, Task.updated_at),
+        (TaskTimeLog, TaskTimeLog.user_id, TaskTimeLog.updated_at),
+        (Tombstone, Tombstone.user_id, Tombstone.deleted_at),
+    )
+
+    pages = []
+    has_more = False
+    for index, (model, user_column, changed_column) in enumerate(sources):
+        query = changes_query(model, user_column, changed_column, current_user.id, positions[index], upper)
+        if model is Task:
+            query = query.options(load_only(*(getattr(Task, field) for field in TASK_FIELDS), Task.updated_at))
+        rows = (await session.execute(query.limit(limit + 1))).scalars().all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            has_more = True
+        if rows:
+            positions[index] = (getattr(rows[-1], changed_column.key), rows[-1].id)
+        pages.append(rows)
+    tasks, time_logs, deleted = pages
+
+    category_ids = {task.id: [] for task in tasks}
+    if tasks:
+        result = await session.execute(
+            select(TaskCategory.task_id, TaskCategory.category_id).where(TaskCategory.task_id.in_(category_ids))
+        )
+        for task_id, category_id in result.all():
+            category_ids[task_id].append(category_id)
+
+    return FastJSONResponse({
+        "status": 200,
+        "tasks": [
+            {**task_to_dict(task, TASK_FIELDS, []), "category_ids": category_ids[task.id], "updated_at": task.updated_at}
+            for task in tasks
+        ],
+        "time_logs": [time_log.model_dump() for time_log in time_logs],
+        "deleted": [{"entity": row.entity, "id": row.entity_id, "deleted_at": row.deleted_at} for row in deleted],
+        # Пока есть следующие страницы, клиент получил не всё до upper
+        "next_cursor": encode_sync_cursor(synced_at if has_more else upper, positions),
+        "has_more": has_more,
+    })
+
+
+# Полнотекстовый поиск по названию и описанию задачи, результаты по убыванию релевантности
+@router.get("/search", response_model=TaskSearchResponse, response_model_exclude_unset=True)
+async def search_tasks(q: str = Query(min_length=1),
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       offset: int = Query(0, ge=0),
+                       fields: Optional[str] = None,
+                       include: Optional[str] = None,
+                       current_user: User = Depends(get_current_user),
+                       session: AsyncSession = Depends(get_read_session)) -> TaskSearchResponse:
+    if task_search is None:
+        raise HTTPException(status_code=501, detail="Search is not supported by this database")
+    # Из одних пробелов не получится ни одного слова, а пустой MATCH в FTS5 — ошибка синтаксиса
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    fields = parse_csv(fields, TASK_FIELDS, "fields")
+    include = parse_csv(include, TASK_RELATIONS, "include")
 
-@router.get("/", response_model=TaskListResponse)
-async def get_all_tasks(current_user: User = Depends(get_current_user), 
-                        session: AsyncSession = Depends(get_session)) -> TaskListResponse:
     result = await session.execute(
-        select(Task)
-        .where(Task.user_id == current_user.id)
-        .options(selectinload(Task.categories), selectinload(Task.time_logs))
+        task_search.query(current_user.id, q)
+        .limit(limit + 1)
+        .offset(offset)
+        .options(*task_read_options(fields, include))
     )
     tasks = result.scalars().all()
-    return {"status": 200, "data": [TaskModel.model_validate(task) for task in tasks]}
+    next_offset = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_offset = offset + limit
+    return FastJSONResponse({"status": 200, "data": [task_to_dict(task, fields, include) for task in tasks], "next_offset": next_offset})
+
+
+# Выгрузка всех задач пользователя в NDJSON: строки читаются курсором на сервере
+# порциями по EXPORT_BATCH_SIZE, поэтому память не растёт с числом задач
+@router.get("/export")
+async def export_tasks(current_user: User = Depends(get_streaming_user)) -> StreamingResponse:
+    user_id = current_user.id
+
+    # Сессия зависимости жила бы до конца ответа, поэтому пользователь читается в короткой
+    # сессии get_streaming_user, а тело — в своей сессии, открытой только на время выгрузки
+    async def lines():
+        async with async_session() as session:
+            result = await session.stream_scalars(
+                select(Task)
+                .where(Task.user_id == user_id)
+                .order_by(Task.id)
+                .options(selectinload(Task.categories), selectinload(Task.time_logs))
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for tasks in result.partitions():
+                yield b"".join(to_json(task_to_dict(task, TASK_FIELDS, TASK_RELATIONS)) + b"\n" for task in tasks)
+                # Выгруженные задачи больше не нужны, убираем их из identity map сессии
+                for task in tasks:
+                    for time_log in task.time_logs:
+                        session.expunge(time_log)
+                    session.expunge(task)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="tasks.ndjson"'},
+    )
 
 
-@router.get("/{task_id}", response_model=TaskResponse)
+@router.get("/{task_id}", response_model=TaskReadResponse, response_model_exclude_unset=True)
 async def get_task(task_id: int, 
+                   fields: Optional[str] = None,
+                   include: Optional[str] = None,
                    current_user: User = Depends(get_current_user),
-                   session: AsyncSession = Depends(get_session)) -> TaskResponse:
+                   session: AsyncSession = Depends(get_read_session)) -> TaskReadResponse:
+    fields = parse_csv(fields, TASK_FIELDS, "fields")
+    include = parse_csv(include, TASK_RELATIONS, "include")
     result = await session.execute(
         select(Task)
-        .options(selectinload(Task.categories), selectinload(Task.time_logs))
-        .where(Task.id == task_id and Task.user_id == current_user.id)
+        .options(*task_read_options(fields, include))
+        .where(Task.id == task_id, Task.user_id == current_user.id)
     )
     task = result.scalars().first()
     if task:
-        return {"status": 200, "data": TaskModel.model_validate(task)}
+        return FastJSONResponse({"status": 200, "data": task_to_dict(task, fields, include)})
     else:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -104,17 +456,25 @@ async def update_task(task_id: int,
                       task_data: TaskCreate, 
                       current_user: User = Depends(get_current_user),
                       session: AsyncSession = Depends(get_session)) -> MessageResponse:
-    result = await session.execute(select(Task).where(Task.id == task_id and Task.user_id == current_user.id))
+    result = await session.execute(select(Task).where(Task.id == task_id, Task.user_id == current_user.id))
     task = result.scalars().first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Обновление полей задачи
+    # Клиенты присылают задачу целиком, поэтому напоминание взводится заново
+    # только при действительно новом сроке, а не при каждом PUT
     if task_data.due_date:
-        task.due_date = task_data.due_date.replace(tzinfo=tz) if task_data.due_date.tzinfo is None else task_data.due_date
+        due_date = to_utc(task_data.due_date)
+        if due_date != to_utc(task.due_date):
+            task.due_reminded_at = None
+        task.due_date = due_date
     if task_data.scheduled_datetime:
-        task.scheduled_datetime = task_data.scheduled_datetime.replace(tzinfo=tz) if task_data.scheduled_datetime.tzinfo is None else task_data.scheduled_datetime
+        scheduled_datetime = to_utc(task_data.scheduled_datetime)
+        if scheduled_datetime != to_utc(task.scheduled_datetime):
+            task.scheduled_reminded_at = None
+        task.scheduled_datetime = scheduled_datetime
     if task_data.title:
         task.title = task_data.title
     if task_data.description:
@@ -122,24 +482,31 @@ async def update_task(task_id: int,
     if task_data.priority:
         task.priority = task_data.priority
 
-    # Обработка категорий (если они переданы)
+    # Отметка ставится до запросов ниже, чтобы autoflush записал её тем же UPDATE
+    task.updated_at = utcnow()
+
+    # Обработка категорий (если они переданы): связи заменяются одним DELETE и одним INSERT,
+    # а дневные итоги по записям задачи переносятся со старых категорий на новые
     if task_data.category_ids is not None:
+        rollup_changes = await time_rollup.task_changes(session, [task.id])
+        await time_rollup.apply_changes(session, current_user.id, time_rollup.negated(rollup_changes))
         await session.execute(
             delete(TaskCategory).where(TaskCategory.task_id == task.id)
         )
-        await session.commit()
-
+        categories = []
         if task_data.category_ids:
-            categories_result = await session.execute(
-                select(Category).where(Category.id.in_(task_data.category_ids))
+            categories = await category_cache.existing(session, task_data.category_ids)
+        if categories:
+            await session.execute(
+                insert(TaskCategory),
+                [{"task_id": task.id, "category_id": category.id} for category in categories],
             )
-            categories = categories_result.scalars().all()
-            for category in categories:
-                task_category = TaskCategory(task_id=task.id, category_id=category.id)
-                session.add(task_category)
+        await time_rollup.apply_changes(
+            session, current_user.id, rollup_changes, {task.id: [category.id for category in categories]}
+        )
 
+    await events.publish(session, current_user.id, "task.updated", [task.id])
     await session.commit()
-    await session.refresh(task)
 
     return {"status": 200, "message": "Task updated successfully"}
 
@@ -147,19 +514,19 @@ async def update_task(task_id: int,
 async def delete_task(task_id: int, 
                       current_user: User = Depends(get_current_user),
                       session: AsyncSession = Depends(get_session)) -> MessageResponse:
-    result = await session.execute(select(Task).where(Task.id == task_id and Task.user_id == current_user.id))
-    task = result.scalars().first()
-    
-    if not task:
+    result = await session.execute(select(Task.id).where(Task.id == task_id, Task.user_id == current_user.id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    # Удаляем связи с категориями
-    await session.execute(
-        delete(TaskCategory).where(TaskCategory.task_id == task.id)
-    )
-    await session.commit()
+    await time_rollup.apply_changes(session, current_user.id, await time_rollup.task_changes(session, [task_id], -1))
+    await tombstone_task(session, current_user.id, task_id)
 
-    await session.delete(task)
+    # Удаляем связи с категориями, записи времени и саму задачу пакетными DELETE:
+    # session.delete(task) подгружал бы обе коллекции ради каскада
+    await session.execute(delete(TaskCategory).where(TaskCategory.task_id == task_id))
+    await session.execute(delete(TaskTimeLog).where(TaskTimeLog.task_id == task_id))
+    await session.execute(delete(Task).where(Task.id == task_id))
+    await events.publish(session, current_user.id, "task.deleted", [task_id])
     await session.commit()
 
     return {"status": 200, "message": "Task deleted successfully"}
@@ -169,33 +536,51 @@ class TaskTimeLogResponse(BaseModel):
     status: int
     data: TaskTimeLog
 
+class TimeSummaryResponse(TypedDict):
+    status: int
+    data: TimeSummary
+
+@router.get("/{task_id}/time_summary", response_model=TimeSummaryResponse)
+async def get_time_summary(task_id: int,
+                           current_user: User = Depends(get_current_user),
+                           session: AsyncSession = Depends(get_read_session)) -> TimeSummaryResponse:
+    result = await session.execute(select(Task.id).where(Task.id == task_id, Task.user_id == current_user.id))
+    if result.scalar() is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    result = await session.execute(user_time_logs_query(current_user.id).where(Task.id == task_id))
+    row = result.one()
+    return {"status": 200, "data": TimeSummary(**row._mapping)}
+
 @router.post("/{task_id}/time_logs", response_model=TaskTimeLogResponse)
 async def add_time_log(task_id: int, 
                        time_log_data: TaskTimeLogDefault, 
                        current_user: User = Depends(get_current_user),
                        session: AsyncSession = Depends(get_session)) -> TaskTimeLogResponse:
 
-    result = await session.execute(select(Task).where(Task.id == task_id and Task.user_id == current_user.id))
+    result = await session.execute(select(Task).where(Task.id == task_id, Task.user_id == current_user.id))
     task = result.scalars().first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    if time_log_data.start_time.tzinfo is None:
-        time_log_data.start_time = tz.localize(time_log_data.start_time)
-    if time_log_data.end_time.tzinfo is None:
-        time_log_data.end_time = tz.localize(time_log_data.end_time)
+    time_log_data.start_time = to_utc(time_log_data.start_time)
+    time_log_data.end_time = to_utc(time_log_data.end_time)
 
     time_log = TaskTimeLog(
         task_id=task.id,
+        user_id=task.user_id,
         start_time = time_log_data.start_time,
         end_time = time_log_data.end_time,
         time_spent=(time_log_data.end_time - time_log_data.start_time).total_seconds()
     )
     
     session.add(time_log)
+    task.updated_at = utcnow()
+    await time_rollup.apply_changes(session, current_user.id, time_rollup.log_changes(time_log))
+    await session.flush()
+    await events.publish(session, current_user.id, "time_log.created", [time_log.id], task_id=task.id)
     await session.commit()
-    await session.refresh(time_log)
 
     return {"status": 200, "data": time_log}
 
@@ -207,7 +592,7 @@ async def update_time_log(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> TaskTimeLogResponse:
-    result = await session.execute(select(Task).where(Task.id == task_id and Task.user_id == current_user.id))
+    result = await session.execute(select(Task).where(Task.id == task_id, Task.user_id == current_user.id))
     task = result.scalars().first()
     
     if not task:
@@ -219,19 +604,20 @@ async def update_time_log(
     if not time_log:
         raise HTTPException(status_code=404, detail="Time log not found")
     
-    if time_log_data.start_time.tzinfo is None:
-        time_log_data.start_time = tz.localize(time_log_data.start_time)
-    if time_log_data.end_time.tzinfo is None:
-        time_log_data.end_time = tz.localize(time_log_data.end_time)
+    time_log_data.start_time = to_utc(time_log_data.start_time)
+    time_log_data.end_time = to_utc(time_log_data.end_time)
     
+    rollup_changes = time_rollup.log_changes(time_log, -1)
     if time_log_data.start_time:
         time_log.start_time = time_log_data.start_time
     if time_log_data.end_time:
         time_log.end_time = time_log_data.end_time
     time_log.time_spent = (time_log_data.end_time - time_log_data.start_time).total_seconds()
+    task.updated_at = utcnow()
+    await time_rollup.apply_changes(session, current_user.id, rollup_changes + time_rollup.log_changes(time_log))
+    await events.publish(session, current_user.id, "time_log.updated", [time_log.id], task_id=task.id)
 
     await session.commit()
-    await session.refresh(time_log)
 
     return {"status": 200, "data": time_log}
 
@@ -241,7 +627,7 @@ async def delete_time_log(task_id: int,
                           time_log_id: int, 
                           current_user: User = Depends(get_current_user),
                           session: AsyncSession = Depends(get_session)) -> MessageResponse:
-    result = await session.execute(select(Task).where(Task.id == task_id and Task.user_id == current_user.id))
+    result = await session.execute(select(Task).where(Task.id == task_id, Task.user_id == current_user.id))
     task = result.scalars().first()
     
     if not task:
@@ -254,6 +640,58 @@ async def delete_time_log(task_id: int,
         raise HTTPException(status_code=404, detail="Time log not found")
     
     await session.delete(time_log)
+    session.add(Tombstone(user_id=current_user.id, entity="time_log", entity_id=time_log.id))
+    task.updated_at = utcnow()
+    await time_rollup.apply_changes(session, current_user.id, time_rollup.log_changes(time_log, -1))
+    await events.publish(session, current_user.id, "time_log.deleted", [time_log.id], task_id=task.id)
     await session.commit()
 
-    return {"status": 200, "message": "Time log deleted successfully"}
\ No newline at end of file
+    return {"status": 200, "message": "Time log deleted successfully"}
+
+# Запуск таймера: запись без end_time. Второй запущенный таймер пользователя
+# отсекает частичный уникальный индекс ux_tasktimelog_user_id_running
+@router.post("/{task_id}/timer/start", response_model=TaskTimeLogResponse)
+async def start_timer(task_id: int,
+                      current_user: User = Depends(get_current_user),
+                      session: AsyncSession = Depends(get_session)) -> TaskTimeLogResponse:
+    now = utcnow()
+    result = await session.execute(
+        update(Task).where(Task.id == task_id, Task.user_id == current_user.id).values(updated_at=now)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Task not found")
+    try:
+        result = await session.scalars(
+            insert(TaskTimeLog)
+            .values(task_id=task_id, user_id=current_user.id, start_time=now, end_time=None, time_spent=0.0)
+            .returning(TaskTimeLog)
+        )
+        time_log = result.one()
+        await events.publish(session, current_user.id, "time_log.created", [time_log.id], task_id=task_id)
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Timer is already running")
+    return {"status": 200, "data": time_log}
+
+# Остановка таймера одним UPDATE ... RETURNING: end_time и time_spent
+# проставляет база, поэтому между чтением и записью нет гонки
+@router.post("/{task_id}/timer/stop", response_model=TaskTimeLogResponse)
+async def stop_timer(task_id: int,
+                     current_user: User = Depends(get_current_user),
+                     session: AsyncSession = Depends(get_session)) -> TaskTimeLogResponse:
+    now = utcnow()
+    result = await session.scalars(
+        update(TaskTimeLog)
+        .where(TaskTimeLog.task_id == task_id, TaskTimeLog.user_id == current_user.id, TaskTimeLog.end_time.is_(None))
+        .values(end_time=now, time_spent=seconds_between(TaskTimeLog.start_time, now, session.bind.dialect.name))
+        .returning(TaskTimeLog)
+    )
+    time_log = result.one_or_none()
+    if time_log is None:
+        raise HTTPException(status_code=404, detail="No running timer for this task")
+    await session.execute(update(Task).where(Task.id == task_id).values(updated_at=now))
+    await time_rollup.apply_changes(session, current_user.id, time_rollup.log_changes(time_log))
+    await events.publish(session, current_user.id, "time_log.updated", [time_log.id], task_id=task_id)
+    await session.commit()
+    return {"status": 200, "data": time_log}
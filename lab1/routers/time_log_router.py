@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select, update
+from connection import get_session
+from auth_services import get_current_user
+from models import Task, TaskTimeLog, TaskTimeLogDefault, User, utcnow
+from typing_extensions import TypedDict
+import time_rollup
+import events
+from batching import check_batch_size, insert_returning_ids
+from time_services import to_utc, utc_day
+
+router = APIRouter()
+
+# Запись из офлайн-буфера клиента: задача указывается в самой записи,
+# а end_time обязателен, запущенные таймеры так не передаются
+class TimeLogBatchItem(TaskTimeLogDefault):
+    task_id: int
+    end_time: datetime
+
+class TimeLogBatchResult(TypedDict):
+    index: int
+    status: int
+    id: Optional[int]
+    detail: Optional[str]
+
+class TimeLogBatchResponse(TypedDict):
+    status: int
+    data: List[TimeLogBatchResult]
+
+# Пакетная загрузка записей времени по разным задачам: владение всеми задачами
+# проверяется одним запросом, подходящие записи вставляются одним многострочным
+# INSERT в одной транзакции. Результат возвращается по каждой записи в порядке запроса
+@router.post("/batch", response_model=TimeLogBatchResponse)
+async def add_time_logs_batch(items: List[TimeLogBatchItem],
+                              current_user: User = Depends(get_current_user),
+                              session: AsyncSession = Depends(get_session)) -> TimeLogBatchResponse:
+    if not items:
+        return {"status": 200, "data": []}
+    check_batch_size(len(items))
+
+    result = await session.execute(
+        select(Task.id).where(Task.id.in_({item.task_id for item in items}), Task.user_id == current_user.id)
+    )
+    owned = set(result.scalars().all())
+
+    results = []
+    rows = []
+    for index, item in enumerate(items):
+        start_time, end_time = to_utc(item.start_time), to_utc(item.end_time)
+        if item.task_id not in owned:
+            results.append({"index": index, "status": 404, "id": None, "detail": "Task not found"})
+        elif end_time < start_time:
+            results.append({"index": index, "status": 400, "id": None, "detail": "end_time is before start_time"})
+        else:
+            results.append({"index": index, "status": 200, "id": None, "detail": None})
+            rows.append({
+                "task_id": item.task_id,
+                "user_id": current_user.id,
+                "start_time": start_time,
+                "end_time": end_time,
+                "time_spent": (end_time - start_time).total_seconds(),
+            })
+
+    if rows:
+        ids = iter(await insert_returning_ids(session, TaskTimeLog, rows))
+        for item_result in results:
+            if item_result["status"] == 200:
+                item_result["id"] = next(ids)
+        await session.execute(
+            update(Task).where(Task.id.in_({row["task_id"] for row in rows})).values(updated_at=utcnow())
+        )
+        await time_rollup.apply_changes(session, current_user.id, [
+            (row["task_id"], utc_day(row["start_time"]), row["time_spent"], 1) for row in rows
+        ])
+        await events.publish(
+            session, current_user.id, "time_log.created",
+            [result["id"] for result in results if result["id"] is not None],
+        )
+        await session.commit()
+
+    return {"status": 200, "data": results}
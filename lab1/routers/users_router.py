@@ -2,10 +2,12 @@ from datetime import timedelta
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 from connection import get_session
-from auth_services import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, get_current_user, get_password_hash, verify_password
+from read_routing import get_read_session
+from auth_services import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, get_current_user, get_password_hash_async, invalidate_cached_user, verify_password_async
 from models import UserDefault, User
 from typing_extensions import TypedDict
 from base_responses import MessageResponse
@@ -37,7 +39,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Async
     query = select(User).where(User.email == form_data.username)
     result = await session.execute(query)
     user = result.scalars().first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Неверный email или пароль")
     access_token = create_access_token(
         data={"sub": user.email},
@@ -48,11 +50,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Async
 
 @router.post("/register", response_model=UserResponse)
 async def register_user(user: UserCreate, session: AsyncSession = Depends(get_session)) -> UserResponse:
-    hashed_pw = get_password_hash(user.password)
+    hashed_pw = await get_password_hash_async(user.password)
     db_user = User(name=user.name, email=user.email, hashed_password=hashed_pw)
     session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
     return {"status": 200, "data": db_user}
 
 
@@ -62,11 +66,14 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> MessageResponse:
-    if not verify_password(passwords.old_password, current_user.hashed_password):
+    if not await verify_password_async(passwords.old_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Неверный старый пароль")
-    current_user.hashed_password = get_password_hash(passwords.new_password)
-    session.add(current_user)
+    user = await session.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.hashed_password = await get_password_hash_async(passwords.new_password)
     await session.commit()
+    invalidate_cached_user(user.email)
     return {"status": 200, "message": "Пароль успешно изменён"}
 
 # Создание пользователя
@@ -80,13 +87,13 @@ async def change_password(
 
 # Получение списка пользователей
 @router.get("/", response_model=UsersListResponse)
-async def get_users(session: AsyncSession = Depends(get_session)) -> UsersListResponse:
+async def get_users(session: AsyncSession = Depends(get_read_session)) -> UsersListResponse:
     users = await session.execute(select(User))
     return {"status": 200, "data": users.scalars().all()}
 
 # Получение пользователя по ID
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, session: AsyncSession = Depends(get_session)) -> UserResponse:
+async def get_user(user_id: int, session: AsyncSession = Depends(get_read_session)) -> UserResponse:
     user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -105,10 +112,14 @@ async def update_user(user_data: UserDefault,
     user = await session.get(User, current_user.id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    old_email = user.email
     for key, value in user_data.dict().items():
         setattr(user, key, value)
-    await session.commit()
-    await session.refresh(user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
+    invalidate_cached_user(old_email)
     return {"status": 200, "data": user}
 
 # Удаление пользователя
@@ -120,4 +131,5 @@ async def delete_user(current_user: User = Depends(get_current_user),
         raise HTTPException(status_code=404, detail="User not found")
     await session.delete(user)
     await session.commit()
+    invalidate_cached_user(user.email)
     return {"status": 200, "message": "User deleted"}
\ No newline at end of file
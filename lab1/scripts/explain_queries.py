@@ -0,0 +1,60 @@
+# Печатает планы выполнения основных запросов роутеров, чтобы убедиться,
+# что они идут по индексам, а не через Seq Scan.
+#
+# Запуск из каталога lab1 (база берётся из SYNC_DB_URL, как у alembic):
+#     python -m scripts.explain_queries --user-id 1
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, func
+from sqlmodel import select
+
+from models import Category, Task, TaskCategory, TaskTimeLog, User
+
+load_dotenv()
+
+def router_queries(user_id: int, email: str, task_id: int):
+    return {
+        "get_current_user": select(User).where(User.email == email),
+        "get_all_tasks": select(Task).where(Task.user_id == user_id).order_by(Task.id).limit(51),
+        "get_all_tasks: categories": (
+            select(Category, TaskCategory.task_id)
+            .join(TaskCategory, TaskCategory.category_id == Category.id)
+            .where(TaskCategory.task_id.in_([task_id]))
+        ),
+        "get_all_tasks: time_logs": select(TaskTimeLog).where(TaskTimeLog.task_id.in_([task_id])),
+        "get_task": select(Task).where(Task.id == task_id, Task.user_id == user_id),
+        "category tasks": select(TaskCategory.task_id).where(TaskCategory.category_id == 1),
+        "time_summary": (
+            select(func.sum(TaskTimeLog.time_spent), func.count(TaskTimeLog.id))
+            .join(Task, Task.id == TaskTimeLog.task_id)
+            .where(Task.user_id == user_id)
+        ),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN для запросов роутеров")
+    parser.add_argument("--url", default=os.getenv("SYNC_DB_URL"))
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--email", default="user@example.com")
+    parser.add_argument("--task-id", type=int, default=1)
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("SYNC_DB_URL не найден в переменных окружения!")
+
+    engine = create_engine(args.url)
+    explain = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN ANALYZE "
+    with engine.connect() as conn:
+        for name, query in router_queries(args.user_id, args.email, args.task_id).items():
+            sql = str(query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            print(f"== {name}")
+            for row in conn.exec_driver_sql(explain + sql):
+                print("   ", " ".join(str(value) for value in row))
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# Пересчитывает дневные итоги timerollup по таблице tasktimelog, например после
+# ручных правок в базе или восстановления из бэкапа. Обычно итоги обновляются
+# обработчиками записей времени и пересчёт не нужен.
+#
+# Запуск из каталога lab1 (база берётся из DB_ADMIN, как у приложения):
+#     python -m scripts.rebuild_time_rollup               # все пользователи
+#     python -m scripts.rebuild_time_rollup --user-id 1 --user-id 2
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import func, select
+
+import time_rollup
+from connection import async_session, engine
+from models import TimeRollup
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Пересчёт дневных итогов по записям времени")
+    parser.add_argument("--user-id", type=int, action="append", help="только эти пользователи (можно повторять)")
+    args = parser.parse_args()
+
+    async with async_session() as session:
+        await time_rollup.rebuild(session, args.user_id)
+        await session.commit()
+        query = select(func.count()).select_from(TimeRollup)
+        if args.user_id:
+            query = query.where(TimeRollup.user_id.in_(args.user_id))
+        rows = (await session.execute(query)).scalar_one()
+    await engine.dispose()
+    print(f"timerollup rebuilt: {rows} rows")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import and_, delete, insert, literal, or_, select
+from connection import async_session, env_bool, env_float
+from models import TaskTimeLog, Tombstone, tz, utcnow
+from pagination import decode_cursor, encode_cursor
+
+# Строки младше SYNC_SETTLE_SECONDS не отдаются: updated_at ставится до коммита,
+# и транзакция, закоммиченная чуть позже, иначе могла бы оказаться позади курсора
+SYNC_SETTLE_SECONDS = env_float("SYNC_SETTLE_SECONDS", 1)
+
+# Следы удалений хранятся SYNC_TOMBSTONE_RETENTION_DAYS дней, затем их удаляет
+# TombstonePruner (каждые SYNC_PRUNE_INTERVAL секунд, если SYNC_PRUNE_ENABLED).
+# Клиент, который полностью синхронизировался раньше этого срока, мог пропустить
+# удаления и получает 410: ему нужна полная синхронизация без курсора
+SYNC_TOMBSTONE_RETENTION_DAYS = env_float("SYNC_TOMBSTONE_RETENTION_DAYS", 30)
+SYNC_PRUNE_ENABLED = env_bool("SYNC_PRUNE_ENABLED", True)
+SYNC_PRUNE_INTERVAL = env_float("SYNC_PRUNE_INTERVAL", 3600)
+
+logger = logging.getLogger("sync")
+
+# Позиция в каждом источнике изменений: (updated_at, id) последней отданной строки
+SyncPosition = Optional[Tuple[str, int]]
+SYNC_SOURCES = ("tasks", "time_logs", "deleted")
+
+def sync_upper_bound() -> datetime:
+    return utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+def tombstone_cutoff() -> datetime:
+    return utcnow() - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+
+def parse_cursor_time(value) -> datetime:
+    try:
+        changed_at = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return changed_at if changed_at.tzinfo else changed_at.replace(tzinfo=tz)
+
+# Курсор: момент, до которого клиент получил все изменения (None, пока первая
+# синхронизация не дочитана до конца), и позиции в источниках
+def decode_sync_cursor(cursor: Optional[str]) -> Tuple[Optional[datetime], List[SyncPosition]]:
+    if cursor is None:
+        return None, [None] * len(SYNC_SOURCES)
+    values = decode_cursor(cursor)
+    if len(values) != len(SYNC_SOURCES) + 2 or values[0] != "changes":
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    synced_at = None if values[1] is None else parse_cursor_time(values[1])
+    if synced_at is not None and synced_at < tombstone_cutoff():
+        raise HTTPException(status_code=410, detail="Cursor is too old, full resync required")
+    positions = []
+    for position in values[2:]:
+        if position is None:
+            positions.append(None)
+            continue
+        if not isinstance(position, list) or len(position) != 2 or not isinstance(position[1], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        positions.append((parse_cursor_time(position[0]), position[1]))
+    return synced_at, positions
+
+def encode_sync_cursor(synced_at: Optional[datetime], positions: List[SyncPosition]) -> str:
+    return encode_cursor("changes", None if synced_at is None else synced_at.isoformat(), *(
+        None if position is None else [position[0].isoformat(), position[1]] for position in positions
+    ))
+
+# Строки источника строго после позиции и не позже upper, в порядке (changed_at, id).
+# Запрос идёт по индексу (user_id, changed_at)
+def changes_query(model, user_column, changed_column, user_id: int, position: SyncPosition, upper: datetime):
+    query = select(model).where(user_column == user_id, changed_column <= upper)
+    if position is not None:
+        changed_at, last_id = position
+        query = query.where(or_(changed_column > changed_at, and_(changed_column == changed_at, model.id > last_id)))
+    return query.order_by(changed_column, model.id)
+
+# Следы удаления записей времени задачи пишутся одним INSERT ... SELECT
+async def tombstone_task(session: AsyncSession, user_id: int, task_id: int) -> None:
+    now = utcnow()
+    await session.execute(
+        insert(Tombstone).from_select(
+            ["user_id", "entity", "entity_id", "deleted_at"],
+            select(TaskTimeLog.user_id, literal("time_log"), TaskTimeLog.id, literal(now, Tombstone.deleted_at.type))
+            .where(TaskTimeLog.task_id == task_id),
+        )
+    )
+    await session.execute(insert(Tombstone).values(user_id=user_id, entity="task", entity_id=task_id, deleted_at=now))
+
+# Удаляет следы старше срока хранения; курсоры старше этого срока отклоняются
+class TombstonePruner:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        async with async_session() as session:
+            result = await session.execute(delete(Tombstone).where(Tombstone.deleted_at < tombstone_cutoff()))
+            await session.commit()
+        return result.rowcount
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("tombstone pruning failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="tombstone-pruner")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+tombstone_pruner = TombstonePruner(SYNC_PRUNE_INTERVAL)
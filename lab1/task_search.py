@@ -0,0 +1,75 @@
+from sqlalchemy import column, table
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import func, literal_column, select
+from models import Task
+
+# Конфигурация to_tsvector зашита в генерируемую колонку, поэтому она общая
+# для миграции, init_db и поисковых запросов
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR_SQL = (
+    f"to_tsvector('{SEARCH_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, ''))"
+)
+
+# PostgreSQL: генерируемая колонка tsvector с GIN-индексом, ранжирование через ts_rank
+class PostgresTaskSearch:
+    async def setup(self, conn: AsyncConnection) -> None:
+        await conn.exec_driver_sql(
+            f"ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+        )
+        await conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING gin (search_vector)"
+        )
+
+    def query(self, user_id: int, q: str):
+        vector = literal_column("task.search_vector")
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+        return (
+            select(Task)
+            .where(Task.user_id == user_id, vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc(), Task.id)
+        )
+
+task_fts = table("task_fts", column("rowid"))
+
+# SQLite (тесты и локальный запуск): внешняя FTS5-таблица по task, синхронизируемая триггерами
+class SqliteTaskSearch:
+    async def setup(self, conn: AsyncConnection) -> None:
+        result = await conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'")
+        if result.first() is not None:
+            return
+        await conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE task_fts USING fts5(title, description, content='task', content_rowid='id')"
+        )
+        await conn.exec_driver_sql(
+            "CREATE TRIGGER task_fts_ai AFTER INSERT ON task BEGIN "
+            "INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        await conn.exec_driver_sql(
+            "CREATE TRIGGER task_fts_ad AFTER DELETE ON task BEGIN "
+            "INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END"
+        )
+        await conn.exec_driver_sql(
+            "CREATE TRIGGER task_fts_au AFTER UPDATE OF title, description ON task BEGIN "
+            "INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+            "INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        await conn.exec_driver_sql("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+
+    def query(self, user_id: int, q: str):
+        # Каждое слово берём в кавычки, чтобы ввод пользователя не разбирался как синтаксис FTS5
+        match = " ".join('"' + word.replace('"', '""') + '"' for word in q.split())
+        return (
+            select(Task)
+            .join(task_fts, task_fts.c.rowid == Task.id)
+            .where(Task.user_id == user_id, literal_column("task_fts").op("MATCH")(match))
+            .order_by(func.bm25(literal_column("task_fts")), Task.id)
+        )
+
+# Для остальных СУБД поиск не поддерживается
+def get_task_search(dialect_name: str):
+    if dialect_name == "postgresql":
+        return PostgresTaskSearch()
+    if dialect_name == "sqlite":
+        return SqliteTaskSearch()
+    return None
@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+
+# Приложение настраивается переменными окружения при импорте, поэтому они
+# задаются до импорта модулей lab1. По умолчанию тесты идут на SQLite во временном файле
+DB_PATH = os.path.join(tempfile.gettempdir(), f"lab1_tests_{os.getpid()}.db")
+os.environ.setdefault("DB_ADMIN", f"sqlite+aiosqlite:///{DB_PATH}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-with-at-least-32-bytes")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("EVENTS_BACKEND", "memory")
+os.environ.setdefault("REMINDERS_ENABLED", "0")
+os.environ.setdefault("REQUEST_METRICS", "1")
+os.environ.setdefault("SYNC_SETTLE_SECONDS", "0")
+os.environ.setdefault("SYNC_PRUNE_ENABLED", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from sqlmodel import SQLModel
+from auth_services import user_cache
+from category_cache import category_cache
+from connection import engine, init_db
+from main import app
+from query_budget import QUERY_BUDGETS, query_budget
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+def clear_caches() -> None:
+    user_cache.clear()
+    category_cache.clear()
+
+# Каждый тест начинает с пустой базы и пустых кэшей
+@pytest.fixture
+async def db():
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("DROP TABLE IF EXISTS task_fts")
+        for name in ("task_fts_ai", "task_fts_ad", "task_fts_au"):
+            await conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        await conn.run_sync(SQLModel.metadata.drop_all)
+    await init_db()
+    clear_caches()
+    yield
+    clear_caches()
+
+@pytest.fixture
+async def client(db):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+async def register(client: httpx.AsyncClient, email: str = "user@example.com", password: str = "password") -> None:
+    response = await client.post("/users/register", json={"name": "user", "email": email, "password": password})
+    assert response.status_code == 200, response.text
+    response = await client.post("/users/login", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    client.headers["Authorization"] = "Bearer " + response.json()["access_token"]
+
+@pytest.fixture
+async def user_client(client):
+    await register(client)
+    return client
+
+# Второй пользователь со своим клиентом — для проверок доступа к чужим данным
+@pytest.fixture
+async def other_client(db):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await register(client, "other@example.com")
+        yield client
+
+# Запрос под бюджетом своего маршрута из QUERY_BUDGETS при холодных кэшах:
+#     response = await budgeted(client, "GET", "/tasks/{task_id}", "/tasks/1")
+async def budgeted(client: httpx.AsyncClient, method: str, route: str, path: str = None, **kwargs) -> httpx.Response:
+    label = f"{method} {route}"
+    clear_caches()
+    with query_budget(QUERY_BUDGETS[label], label):
+        response = await client.request(method, path or route, **kwargs)
+    assert response.status_code < 400, f"{label}: {response.status_code} {response.text}"
+    return response
+
+# ASGI-запрос в обход httpx: нужен, когда тело ответа проверяется по частям
+# или поток не завершается сам
+def http_scope(method: str, path: str, client: httpx.AsyncClient) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"test"), (b"authorization", client.headers["Authorization"].encode())],
+        "client": ("test", 1), "server": ("test", 80),
+    }
@@ -0,0 +1,49 @@
+# Сценарий для test_read_routing: движки создаются при импорте connection, поэтому
+# он запускается отдельным процессом с DB_ADMIN и DB_READ_REPLICA на разные файлы SQLite.
+# Реплика получает только схему, так что по числу задач в ответе видно, какая база читалась
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlmodel import SQLModel
+from connection import close_db, init_db, read_engine
+from main import app
+from read_routing import DB_READ_STICKY_SECONDS, STICKY_COOKIE, recent_writers
+
+async def main() -> None:
+    await init_db()
+    async with read_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    seen = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/users/register", json={"name": "user", "email": "user@example.com", "password": "password"})
+        response = await client.post("/users/login", data={"username": "user@example.com", "password": "password"})
+        client.headers["Authorization"] = "Bearer " + response.json()["access_token"]
+
+        response = await client.post("/tasks/", json={"title": "written"})
+        seen["cookie_set"] = STICKY_COOKIE in response.cookies
+        seen["after_write"] = len((await client.get("/tasks/")).json()["data"])
+
+        # Только cookie: память процесса о писателе очищена
+        recent_writers.clear()
+        seen["cookie_only"] = len((await client.get("/tasks/")).json()["data"])
+
+        # Только заголовок Authorization: клиент без cookie
+        await client.post("/tasks/", json={"title": "second"})
+        client.cookies.clear()
+        seen["authorization_only"] = len((await client.get("/tasks/")).json()["data"])
+
+        await asyncio.sleep(DB_READ_STICKY_SECONDS + 0.2)
+        client.cookies.clear()
+        seen["after_window"] = len((await client.get("/tasks/")).json()["data"])
+    await close_db()
+    print(json.dumps(seen))
+
+if __name__ == "__main__":
+    asyncio.run(main())
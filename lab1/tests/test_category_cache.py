@@ -0,0 +1,40 @@
+import pytest
+from sqlmodel import delete, select
+from category_cache import category_cache
+from connection import async_session
+from models import CacheVersion, Category
+
+pytestmark = pytest.mark.anyio
+
+async def test_bump_version_creates_and_increments_row(db):
+    for expected in (1, 2):
+        async with async_session() as session:
+            await category_cache.bump_version(session)
+            await session.commit()
+        async with async_session() as session:
+            version = await session.scalar(select(CacheVersion.version).where(CacheVersion.name == category_cache.name))
+        assert version == expected
+
+# Изменения категорий другим воркером: база и версия меняются, а кэш этого
+# процесса не очищается и проверил версию меньше CATEGORY_CACHE_CHECK_INTERVAL назад
+async def test_task_writes_see_category_changes_from_other_workers(user_client):
+    response = await user_client.post("/categories/", json={"name": "old"})
+    old_id = response.json()["data"]["id"]
+    assert [category["id"] for category in (await user_client.get("/categories/")).json()["data"]] == [old_id]
+
+    async with async_session() as session:
+        new_category = Category(name="new")
+        session.add(new_category)
+        await session.flush()
+        await session.execute(delete(Category).where(Category.id == old_id))
+        await category_cache.bump_version(session)
+        await session.commit()
+
+    response = await user_client.post("/tasks/", json={"title": "first", "category_ids": [old_id]})
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["categories"] == []
+
+    response = await user_client.post("/tasks/batch", json=[{"title": "second", "category_ids": [new_category.id]}])
+    assert response.status_code == 200, response.text
+    response = await user_client.get(f"/tasks/{response.json()['data'][0]}", params={"include": "categories"})
+    assert [category["id"] for category in response.json()["data"]["categories"]] == [new_category.id]
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from auth_services import user_cache
+from conftest import http_scope
+from connection import engine
+from events import PostgresBroker
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+# Поток /events не завершается сам, поэтому приложение вызывается напрямую через ASGI,
+# а отключение клиента имитируется сообщением http.disconnect
+async def test_event_stream_does_not_hold_pool_connection(user_client):
+    user_cache.clear()
+    messages = asyncio.Queue()
+    disconnect = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    stream = asyncio.create_task(app(http_scope("GET", "/events/", user_client), receive, messages.put))
+    start = await asyncio.wait_for(messages.get(), 5)
+    assert start["type"] == "http.response.start" and start["status"] == 200
+
+    response = await user_client.post("/tasks/", json={"title": "streamed"})
+    assert response.status_code == 200
+    while True:
+        body = (await asyncio.wait_for(messages.get(), 5)).get("body", b"")
+        if b"task.created" in body:
+            break
+    assert engine.sync_engine.pool.checkedout() == 0
+
+    disconnect.set()
+    await asyncio.wait_for(stream, 5)
+
+class FakeConnection:
+    def __init__(self):
+        self.termination_listeners = []
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    async def fetchval(self, query):
+        return 1
+
+    def terminate(self):
+        self.closed = True
+
+    async def close(self):
+        self.closed = True
+
+    def drop(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+class FlakyBroker(PostgresBroker):
+    def __init__(self):
+        super().__init__(10, "postgresql://unused", "task_events", check_interval=1, max_delay=0.01)
+        self.attempts = 0
+        self.connections = []
+
+    async def _connect(self):
+        self.attempts += 1
+        if self.attempts == 2:
+            raise OSError("connection refused")
+        self.connections.append(FakeConnection())
+        return self.connections[-1]
+
+async def test_postgres_broker_reconnects_and_asks_for_resync():
+    broker = FlakyBroker()
+    queue = broker.subscribe(1)
+    await broker.start()
+    try:
+        await asyncio.sleep(0.01)
+        assert len(broker.connections) == 1 and broker.reconnects == 0
+
+        broker.connections[0].drop()
+        for _ in range(200):
+            if broker.reconnects:
+                break
+            await asyncio.sleep(0.01)
+        assert broker.attempts == 3 and len(broker.connections) == 2
+        assert queue.get_nowait() == {"type": "resync"}
+    finally:
+        await broker.stop()
+    assert broker.connections[1].closed
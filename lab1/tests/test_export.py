@@ -0,0 +1,36 @@
+import asyncio
+import json
+import pytest
+from auth_services import user_cache
+from conftest import http_scope
+from connection import engine
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+# Пока отправляется тело, из пула занято только соединение самой выгрузки
+async def test_export_streams_without_holding_auth_session(user_client):
+    for title in ("first", "second"):
+        await user_client.post("/tasks/", json={"title": title})
+    user_cache.clear()
+    chunks = []
+    checked_out = []
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            checked_out.append(engine.sync_engine.pool.checkedout())
+            chunks.append(message["body"])
+
+    await app(http_scope("GET", "/tasks/export", user_client), receive, send)
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["first", "second"]
+    assert checked_out and max(checked_out) == 1
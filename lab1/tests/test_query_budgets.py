@@ -0,0 +1,61 @@
+import pytest
+from conftest import budgeted, register
+from query_budget import QUERY_BUDGETS
+
+pytestmark = pytest.mark.anyio
+
+LOG = {"start_time": "2025-06-01T10:00:00+00:00", "end_time": "2025-06-01T11:00:00+00:00"}
+
+# Не проверяются: поток событий не завершается сам, а GET /users/me
+# перехватывается маршрутом /users/{user_id}
+UNCHECKED = {"GET /events/", "GET /users/me"}
+
+async def test_routes_stay_within_query_budgets(client):
+    await register(client)
+    checked = set()
+
+    async def call(method, route, path=None, **kwargs):
+        checked.add(f"{method} {route}")
+        return await budgeted(client, method, route, path, **kwargs)
+
+    await call("POST", "/categories/", json={"name": "work"})
+    await call("GET", "/categories/")
+    await call("GET", "/categories/{category_id}", "/categories/1")
+    await call("PUT", "/categories/{category_id}", "/categories/1", json={"name": "job"})
+    await call("POST", "/tasks/", json={"title": "first", "category_ids": [1]})
+    await call("POST", "/tasks/batch", json=[{"title": "second", "category_ids": [1]}, {"title": "third"}])
+    await client.post("/tasks/1/time_logs", json=LOG)
+    await client.post("/tasks/2/time_logs", json=LOG)
+    await call("GET", "/tasks/")
+    await call("GET", "/tasks/", params={"include": "categories,time_logs"})
+    await call("GET", "/tasks/search", params={"q": "first"})
+    await call("GET", "/tasks/changes")
+    await call("GET", "/tasks/export")
+    await call("GET", "/tasks/{task_id}", "/tasks/1")
+    await call("PUT", "/tasks/{task_id}", "/tasks/1", json={"title": "renamed", "category_ids": [1]})
+    await call("GET", "/tasks/{task_id}/time_summary", "/tasks/1/time_summary")
+    response = await call("POST", "/tasks/{task_id}/time_logs", "/tasks/1/time_logs", json=LOG)
+    time_log_path = f"/tasks/1/time_logs/{response.json()['data']['id']}"
+    await call("PUT", "/tasks/{task_id}/time_logs/{time_log_id}", time_log_path,
+               json={**LOG, "end_time": "2025-06-01T12:00:00+00:00"})
+    await call("DELETE", "/tasks/{task_id}/time_logs/{time_log_id}", time_log_path)
+    await call("POST", "/tasks/{task_id}/timer/start", "/tasks/1/timer/start")
+    await call("POST", "/tasks/{task_id}/timer/stop", "/tasks/1/timer/stop")
+    await call("POST", "/time_logs/batch", json=[{"task_id": 1, **LOG}])
+    await call("GET", "/reports/time")
+    await call("GET", "/reports/timesheet", params={"from": "2025-06-01", "to": "2025-06-30"})
+    await call("DELETE", "/tasks/{task_id}", "/tasks/2")
+    await call("DELETE", "/categories/{category_id}", "/categories/1")
+    for route in ("/metrics/auth_cache", "/metrics/category_cache", "/metrics/pool", "/metrics/requests"):
+        await call("GET", route)
+
+    await call("GET", "/users/")
+    await call("GET", "/users/{user_id}", "/users/1")
+    await call("PUT", "/users/change_password", json={"old_password": "password", "new_password": "changed"})
+    await call("PUT", "/users/me", json={"name": "renamed", "email": "user@example.com", "password": "changed"})
+    await call("POST", "/users/register", json={"name": "other", "email": "other@example.com", "password": "password"})
+    response = await call("POST", "/users/login", data={"username": "other@example.com", "password": "password"})
+    client.headers["Authorization"] = "Bearer " + response.json()["access_token"]
+    await call("DELETE", "/users/me")
+
+    assert checked == set(QUERY_BUDGETS) - UNCHECKED
@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+
+SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replica_scenario.py")
+
+def test_reads_stick_to_primary_after_write_then_use_replica(tmp_path):
+    env = {
+        **os.environ,
+        "DB_ADMIN": f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        "DB_READ_REPLICA": f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+        "DB_READ_STICKY_SECONDS": "0.5",
+    }
+    result = subprocess.run([sys.executable, SCENARIO], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    seen = json.loads(result.stdout.strip().splitlines()[-1])
+    assert seen == {
+        "cookie_set": True,
+        "after_write": 1,
+        "cookie_only": 1,
+        "authorization_only": 2,
+        "after_window": 0,
+    }
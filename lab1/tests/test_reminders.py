@@ -0,0 +1,25 @@
+import pytest
+from reminders import MemoryReminderSink, ReminderWorker
+
+pytestmark = pytest.mark.anyio
+
+DUE_DATE = "2025-06-01T10:00:00+00:00"
+
+async def test_put_with_unchanged_due_date_does_not_resend_reminder(user_client):
+    sink = MemoryReminderSink()
+    worker = ReminderWorker(sink, interval=1, batch_size=100)
+    response = await user_client.post("/tasks/", json={"title": "report", "due_date": DUE_DATE})
+    assert response.status_code == 200, response.text
+    task_id = response.json()["data"]["id"]
+
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+
+    response = await user_client.put(f"/tasks/{task_id}", json={"title": "renamed", "due_date": DUE_DATE})
+    assert response.status_code == 200, response.text
+    assert await worker.run_once() == 0
+
+    response = await user_client.put(f"/tasks/{task_id}", json={"title": "renamed", "due_date": "2025-06-02T10:00:00+00:00"})
+    assert response.status_code == 200, response.text
+    assert await worker.run_once() == 1
+    assert [(reminder.task_id, reminder.kind) for reminder in sink.reminders] == [(task_id, "due"), (task_id, "due")]
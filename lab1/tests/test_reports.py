@@ -0,0 +1,48 @@
+from collections import defaultdict
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+# Записи в чужих часовых поясах около полуночи, у одной задачи категории нет
+LOGS = [
+    ("work", "2025-06-01T22:30:00-03:00", "2025-06-01T23:30:00-03:00"),
+    ("work", "2025-06-01T10:00:00+00:00", "2025-06-01T11:00:00+00:00"),
+    ("misc", "2025-06-02T00:30:00+05:00", "2025-06-02T02:30:00+05:00"),
+]
+
+@pytest.fixture
+async def logged(user_client):
+    response = await user_client.post("/categories/", json={"name": "work"})
+    category_id = response.json()["data"]["id"]
+    task_ids = {}
+    for title, category_ids in (("work", [category_id]), ("misc", [])):
+        response = await user_client.post("/tasks/", json={"title": title, "category_ids": category_ids})
+        task_ids[title] = response.json()["data"]["id"]
+    for title, start_time, end_time in LOGS:
+        response = await user_client.post(f"/tasks/{task_ids[title]}/time_logs",
+                                          json={"start_time": start_time, "end_time": end_time})
+        assert response.status_code == 200, response.text
+    return category_id
+
+async def timesheet_totals(client, key: str) -> dict:
+    response = await client.get("/reports/timesheet", params={"from": "2025-05-01", "to": "2025-06-30"})
+    assert response.status_code == 200, response.text
+    totals = defaultdict(float)
+    for row in response.json()["data"]:
+        totals[row[key]] += row["total_seconds"]
+    return dict(totals)
+
+async def test_time_report_by_day_matches_timesheet(user_client, logged):
+    response = await user_client.get("/reports/time", params={"group_by": "day"})
+    assert response.status_code == 200, response.text
+    by_day = {row["key"]: row["total_seconds"] for row in response.json()["data"]}
+    assert by_day == {"2025-06-01": 10800.0, "2025-06-02": 3600.0}
+    assert by_day == await timesheet_totals(user_client, "day")
+
+async def test_time_report_by_category_keeps_uncategorized_logs(user_client, logged):
+    response = await user_client.get("/reports/time", params={"group_by": "category"})
+    assert response.status_code == 200, response.text
+    rows = response.json()["data"]
+    assert [(row["key"], row["label"], row["entries"]) for row in rows] == [(str(logged), "work", 2), (None, None, 1)]
+    by_category = {None if row["key"] is None else int(row["key"]): row["total_seconds"] for row in rows}
+    assert by_category == await timesheet_totals(user_client, "category_id")
@@ -0,0 +1,36 @@
+from datetime import timedelta
+import pytest
+from sqlmodel import select
+from connection import async_session
+from models import Tombstone, utcnow
+from sync import SYNC_TOMBSTONE_RETENTION_DAYS, encode_sync_cursor, tombstone_pruner
+
+pytestmark = pytest.mark.anyio
+
+async def test_deletions_are_delivered_after_cursor(user_client):
+    response = await user_client.post("/tasks/", json={"title": "temporary"})
+    task_id = response.json()["data"]["id"]
+    response = await user_client.get("/tasks/changes")
+    assert [task["id"] for task in response.json()["tasks"]] == [task_id]
+    cursor = response.json()["next_cursor"]
+
+    await user_client.delete(f"/tasks/{task_id}")
+    response = await user_client.get("/tasks/changes", params={"since": cursor})
+    assert response.status_code == 200, response.text
+    assert [(row["entity"], row["id"]) for row in response.json()["deleted"]] == [("task", task_id)]
+
+async def test_cursor_older_than_retention_requires_full_resync(user_client):
+    synced_at = utcnow() - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+    response = await user_client.get("/tasks/changes", params={"since": encode_sync_cursor(synced_at, [None] * 3)})
+    assert response.status_code == 410
+
+async def test_pruner_removes_only_expired_tombstones(db):
+    expired = utcnow() - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+    async with async_session() as session:
+        session.add(Tombstone(user_id=1, entity="task", entity_id=1, deleted_at=expired))
+        session.add(Tombstone(user_id=1, entity="task", entity_id=2, deleted_at=utcnow()))
+        await session.commit()
+
+    assert await tombstone_pruner.run_once() == 1
+    async with async_session() as session:
+        assert (await session.execute(select(Tombstone.entity_id))).scalars().all() == [2]
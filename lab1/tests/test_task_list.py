@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import get_args
+import pytest
+from routers.task_router import TaskSort
+
+pytestmark = pytest.mark.anyio
+
+PRIORITY_RANK = {"high": 1, "medium": 2, "low": 3}
+
+# Сроки с разными смещениями и NULL, повторяющиеся значения — чтобы сработали
+# ветки курсора по id при равных значениях и «NULL в конце»
+TASKS = [
+    {"title": "a", "priority": 3, "due_date": "2025-05-01T10:00:00+03:00", "scheduled_datetime": "2025-05-03T09:00:00+00:00"},
+    {"title": "b", "priority": 1, "due_date": None, "scheduled_datetime": "2025-05-02T09:00:00+00:00"},
+    {"title": "c", "priority": 2, "due_date": "2025-05-01T08:30:00+00:00", "scheduled_datetime": None},
+    {"title": "d", "priority": 1, "due_date": "2025-05-01T10:00:00+03:00", "scheduled_datetime": "2025-05-02T23:00:00-05:00"},
+    {"title": "e", "priority": 3, "due_date": None, "scheduled_datetime": None},
+    {"title": "f", "priority": 2, "due_date": "2025-04-30T23:00:00-02:00", "scheduled_datetime": "2025-05-01T00:00:00+00:00"},
+    {"title": "g", "priority": 2, "due_date": "2025-05-02T00:00:00+00:00", "scheduled_datetime": "2025-05-03T09:00:00+00:00"},
+]
+
+FILTERS = [
+    {},
+    {"priority": 2},
+    {"due_before": "2025-05-01T08:00:00Z"},
+    {"due_after": "2025-05-01T07:00:00Z"},
+    {"scheduled_between": "2025-05-01T00:00:00Z,2025-05-03T00:00:00Z"},
+    {"category_id": 1},
+]
+
+def instant(value):
+    return None if value is None else datetime.fromisoformat(value)
+
+def matches(task, filters) -> bool:
+    due = instant(task["due_date"])
+    scheduled = instant(task["scheduled_datetime"])
+    if "priority" in filters and task["priority"] != filters["priority"]:
+        return False
+    if "due_before" in filters and not (due is not None and due < instant(filters["due_before"].replace("Z", "+00:00"))):
+        return False
+    if "due_after" in filters and not (due is not None and due >= instant(filters["due_after"].replace("Z", "+00:00"))):
+        return False
+    if "scheduled_between" in filters:
+        start, end = (instant(part.replace("Z", "+00:00")) for part in filters["scheduled_between"].split(","))
+        if not (scheduled is not None and start <= scheduled < end):
+            return False
+    if "category_id" in filters and task["id"] % 2:
+        return False
+    return True
+
+# Ожидаемый порядок: значения по возрастанию (или убыванию), NULL в конце, при равенстве — id
+def expected_ids(tasks, sort: str) -> list:
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    def value(task):
+        if field == "priority":
+            return task["priority"]
+        if field == "id":
+            return task["id"]
+        return instant(task[field])
+    present = sorted((task for task in tasks if value(task) is not None),
+                     key=lambda task: (value(task), task["id"]), reverse=descending)
+    missing = sorted((task for task in tasks if value(task) is None), key=lambda task: task["id"], reverse=descending)
+    return [task["id"] for task in present + missing]
+
+@pytest.fixture
+async def tasks(user_client):
+    await user_client.post("/categories/", json={"name": "even"})
+    created = []
+    for task in TASKS:
+        task_id = len(created) + 1
+        response = await user_client.post("/tasks/", json={**task, "category_ids": [] if task_id % 2 else [1]})
+        assert response.status_code == 200, response.text
+        assert response.json()["data"]["id"] == task_id
+        created.append({**task, "id": task_id})
+    return created
+
+async def paged_ids(client, params: dict, limit: int) -> list:
+    ids = []
+    after = None
+    while True:
+        response = await client.get("/tasks/", params={**params, "limit": limit, **({"after": after} if after else {})})
+        assert response.status_code == 200, response.text
+        ids += [task["id"] for task in response.json()["data"]]
+        after = response.json()["next_cursor"]
+        if after is None:
+            return ids
+
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda filters: ",".join(filters) or "all")
+@pytest.mark.parametrize("sort", get_args(TaskSort))
+async def test_keyset_pages_match_unpaged_order(user_client, tasks, sort, filters):
+    params = {"sort": sort, **filters}
+    expected = expected_ids([task for task in tasks if matches(task, filters)], sort)
+    assert await paged_ids(user_client, params, limit=100) == expected
+    assert await paged_ids(user_client, params, limit=2) == expected
+
+async def test_cursor_for_another_sort_is_rejected(user_client, tasks):
+    response = await user_client.get("/tasks/", params={"sort": "due_date", "limit": 2})
+    cursor = response.json()["next_cursor"]
+    response = await user_client.get("/tasks/", params={"sort": "-priority", "after": cursor})
+    assert response.status_code == 400
+    response = await user_client.get("/tasks/", params={"sort": "due_date", "after": "not-a-cursor"})
+    assert response.status_code == 400
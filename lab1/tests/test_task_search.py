@@ -0,0 +1,15 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_whitespace_query_is_rejected(user_client):
+    response = await user_client.get("/tasks/search", params={"q": "  "})
+    assert response.status_code == 400
+
+async def test_query_with_quotes_is_matched_literally(user_client):
+    await user_client.post("/tasks/", json={"title": 'say "hello" world'})
+    await user_client.post("/tasks/", json={"title": "other"})
+    for q in ('"hello"', 'hello"', 'say "hello'):
+        response = await user_client.get("/tasks/search", params={"q": q})
+        assert response.status_code == 200, response.text
+        assert [task["title"] for task in response.json()["data"]] == ['say "hello" world']
@@ -0,0 +1,49 @@
+import pytest
+from sqlmodel import select
+import time_rollup
+from connection import async_session
+from models import TimeRollup
+
+pytestmark = pytest.mark.anyio
+
+async def rollup_rows():
+    async with async_session() as session:
+        result = await session.execute(
+            select(TimeRollup.day, TimeRollup.category_id, TimeRollup.seconds, TimeRollup.entries)
+            .where(TimeRollup.entries != 0)
+            .order_by(TimeRollup.day, TimeRollup.category_id)
+        )
+        return [tuple(row) for row in result.all()]
+
+async def rebuilt_rows():
+    async with async_session() as session:
+        await time_rollup.rebuild(session)
+        await session.commit()
+    return await rollup_rows()
+
+# Запись в чужом часовом поясе около полуночи: инкрементальные итоги и пересчёт
+# в базе должны отнести её к одному и тому же дню по UTC
+async def test_incremental_rollup_matches_rebuild_for_non_utc_times(user_client):
+    response = await user_client.post("/tasks/", json={"title": "night shift"})
+    task_id = response.json()["data"]["id"]
+
+    response = await user_client.post(f"/tasks/{task_id}/time_logs", json={
+        "start_time": "2025-06-01T22:30:00-03:00", "end_time": "2025-06-01T23:30:00-03:00",
+    })
+    assert response.status_code == 200, response.text
+    incremental = await rollup_rows()
+    assert [(str(day), seconds) for day, _, seconds, _ in incremental] == [("2025-06-02", 3600.0)]
+    assert incremental == await rebuilt_rows()
+
+    time_log_id = response.json()["data"]["id"]
+    response = await user_client.put(f"/tasks/{task_id}/time_logs/{time_log_id}", json={
+        "start_time": "2025-06-02T23:30:00+05:00", "end_time": "2025-06-03T01:30:00+05:00",
+    })
+    assert response.status_code == 200, response.text
+    response = await user_client.post("/time_logs/batch", json=[{
+        "task_id": task_id, "start_time": "2025-06-03T21:00:00-04:00", "end_time": "2025-06-03T22:00:00-04:00",
+    }])
+    assert response.status_code == 200, response.text
+    incremental = await rollup_rows()
+    assert [(str(day), seconds) for day, _, seconds, _ in incremental] == [("2025-06-02", 7200.0), ("2025-06-04", 3600.0)]
+    assert incremental == await rebuilt_rows()
@@ -0,0 +1,57 @@
+from datetime import timedelta
+import pytest
+from sqlmodel import select, update
+from connection import async_session
+from models import TaskTimeLog, TimeRollup, utcnow
+
+pytestmark = pytest.mark.anyio
+
+async def create_task(client, title: str) -> int:
+    response = await client.post("/tasks/", json={"title": title})
+    assert response.status_code == 200, response.text
+    return response.json()["data"]["id"]
+
+async def test_only_one_timer_can_run(user_client):
+    first = await create_task(user_client, "first")
+    second = await create_task(user_client, "second")
+    response = await user_client.post(f"/tasks/{first}/timer/start")
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["end_time"] is None
+
+    assert (await user_client.post(f"/tasks/{first}/timer/start")).status_code == 409
+    assert (await user_client.post(f"/tasks/{second}/timer/start")).status_code == 409
+
+async def test_stop_computes_time_spent_and_rollup(user_client):
+    task_id = await create_task(user_client, "work")
+    response = await user_client.post(f"/tasks/{task_id}/timer/start")
+    time_log_id = response.json()["data"]["id"]
+    # Таймер будто запущен полтора часа назад
+    started = utcnow() - timedelta(minutes=90)
+    async with async_session() as session:
+        await session.execute(update(TaskTimeLog).where(TaskTimeLog.id == time_log_id).values(start_time=started))
+        await session.commit()
+
+    response = await user_client.post(f"/tasks/{task_id}/timer/stop")
+    assert response.status_code == 200, response.text
+    time_spent = response.json()["data"]["time_spent"]
+    assert response.json()["data"]["end_time"] is not None
+    assert 5400 <= time_spent < 5410
+
+    async with async_session() as session:
+        rows = (await session.execute(select(TimeRollup.day, TimeRollup.seconds, TimeRollup.entries))).all()
+    assert len(rows) == 1
+    day, seconds, entries = rows[0]
+    assert (day, entries) == (started.date(), 1)
+    assert seconds == pytest.approx(time_spent)
+
+    assert (await user_client.post(f"/tasks/{task_id}/timer/stop")).status_code == 404
+
+async def test_stop_without_running_timer_is_not_found(user_client):
+    task_id = await create_task(user_client, "idle")
+    assert (await user_client.post(f"/tasks/{task_id}/timer/stop")).status_code == 404
+
+async def test_timer_on_another_users_task_is_not_found(user_client, other_client):
+    task_id = await create_task(user_client, "private")
+    assert (await other_client.post(f"/tasks/{task_id}/timer/start")).status_code == 404
+    await user_client.post(f"/tasks/{task_id}/timer/start")
+    assert (await other_client.post(f"/tasks/{task_id}/timer/stop")).status_code == 404
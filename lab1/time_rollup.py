@@ -0,0 +1,96 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, func, insert, select
+from models import TaskCategory, TaskTimeLog, TimeRollup
+from time_services import utc_day
+
+# Задачи без категорий учитываются в строке с category_id = 0
+UNCATEGORIZED = 0
+
+# Изменение итогов от записей времени одной задачи за один день:
+# (task_id, day, seconds, entries); у вычитаемых записей значения отрицательные
+RollupChange = Tuple[int, date, float, int]
+
+# Вклад записи в итоги. Запущенный таймер (без end_time) в итоги не входит
+def log_changes(time_log: TaskTimeLog, sign: int = 1) -> List[RollupChange]:
+    if time_log.end_time is None:
+        return []
+    return [(time_log.task_id, utc_day(time_log.start_time), sign * time_log.time_spent, sign)]
+
+def negated(changes: Iterable[RollupChange]) -> List[RollupChange]:
+    return [(task_id, day, -seconds, -entries) for task_id, day, seconds, entries in changes]
+
+# Итоги по уже сохранённым записям задач, например чтобы перенести их при смене категорий
+async def task_changes(session: AsyncSession, task_ids: Iterable[int], sign: int = 1) -> List[RollupChange]:
+    day = utc_day(TaskTimeLog.start_time, session.bind.dialect.name)
+    result = await session.execute(
+        select(TaskTimeLog.task_id, day, func.sum(TaskTimeLog.time_spent), func.count(TaskTimeLog.id))
+        .where(TaskTimeLog.task_id.in_(list(task_ids)), TaskTimeLog.end_time.is_not(None))
+        .group_by(TaskTimeLog.task_id, day)
+    )
+    return [(task_id, day, sign * seconds, sign * entries) for task_id, day, seconds, entries in result.all()]
+
+def rollup_upsert(dialect: str):
+    statement = (postgresql if dialect == "postgresql" else sqlite).insert(TimeRollup)
+    return statement.on_conflict_do_update(
+        index_elements=[TimeRollup.user_id, TimeRollup.day, TimeRollup.category_id],
+        set_={
+            "seconds": TimeRollup.seconds + statement.excluded.seconds,
+            "entries": TimeRollup.entries + statement.excluded.entries,
+        },
+    )
+
+# Прибавляет изменения к итогам по текущим категориям задач: один SELECT категорий
+# (если они не переданы в categories) и один INSERT ... ON CONFLICT DO UPDATE
+# на все затронутые (день, категория)
+async def apply_changes(session: AsyncSession, user_id: int, changes: Iterable[RollupChange],
+                        categories: Optional[Dict[int, List[int]]] = None) -> None:
+    changes = [change for change in changes if change[3]]
+    if not changes:
+        return
+    if categories is None:
+        result = await session.execute(
+            select(TaskCategory.task_id, TaskCategory.category_id)
+            .where(TaskCategory.task_id.in_({change[0] for change in changes}))
+        )
+        categories = defaultdict(list)
+        for task_id, category_id in result.all():
+            categories[task_id].append(category_id)
+
+    totals = defaultdict(lambda: [0.0, 0])
+    for task_id, day, seconds, entries in changes:
+        for category_id in categories.get(task_id) or [UNCATEGORIZED]:
+            total = totals[(day, category_id)]
+            total[0] += seconds
+            total[1] += entries
+    await session.execute(
+        rollup_upsert(session.bind.dialect.name),
+        [
+            {"user_id": user_id, "day": day, "category_id": category_id, "seconds": seconds, "entries": entries}
+            for (day, category_id), (seconds, entries) in totals.items()
+        ],
+    )
+
+# Пересчёт итогов с нуля по записям времени (всех или только указанных пользователей)
+async def rebuild(session: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> None:
+    day = utc_day(TaskTimeLog.start_time, session.bind.dialect.name)
+    category_id = func.coalesce(TaskCategory.category_id, UNCATEGORIZED)
+    query = (
+        select(TaskTimeLog.user_id, day, category_id, func.sum(TaskTimeLog.time_spent), func.count(TaskTimeLog.id))
+        .select_from(TaskTimeLog)
+        .outerjoin(TaskCategory, TaskCategory.task_id == TaskTimeLog.task_id)
+        .where(TaskTimeLog.end_time.is_not(None))
+        .group_by(TaskTimeLog.user_id, day, category_id)
+    )
+    clear = delete(TimeRollup)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        query = query.where(TaskTimeLog.user_id.in_(user_ids))
+        clear = clear.where(TimeRollup.user_id.in_(user_ids))
+    await session.execute(clear)
+    await session.execute(
+        insert(TimeRollup).from_select(["user_id", "day", "category_id", "seconds", "entries"], query)
+    )
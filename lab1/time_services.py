@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from sqlmodel import cast, func, select
+from sqlalchemy import Date, Float
+from models import Task, TaskTimeLog, tz
+
+class TimeSummary(BaseModel):
+    total_seconds: float
+    entries: int
+    first_start: Optional[datetime] = None
+    last_end: Optional[datetime] = None
+
+class TimeReportRow(TimeSummary):
+    # None — строка записей задач без категорий в отчёте по категориям
+    key: Optional[str] = None
+    label: Optional[str] = None
+
+# Агрегаты по логам времени считаются в базе, клиенту уходят только итоги
+def time_aggregates():
+    return (
+        func.coalesce(func.sum(TaskTimeLog.time_spent), 0).label("total_seconds"),
+        func.count(TaskTimeLog.id).label("entries"),
+        func.min(TaskTimeLog.start_time).label("first_start"),
+        func.max(TaskTimeLog.end_time).label("last_end"),
+    )
+
+def user_time_logs_query(user_id: int, *columns):
+    return (
+        select(*columns, *time_aggregates())
+        .select_from(TaskTimeLog)
+        .join(Task, Task.id == TaskTimeLog.task_id)
+        .where(Task.user_id == user_id)
+    )
+
+# Секунды от start до end, посчитанные в базе: так остановка таймера обходится
+# одним UPDATE без чтения start_time в Python
+def seconds_between(start, end, dialect: str):
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    return cast(func.extract("epoch", end - start), Float)
+
+# Время записи в UTC; значения без часового пояса считаются UTC. SQLite хранит
+# время без смещения, поэтому иначе 23:30-03:00 легло бы в базу как 23:30
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=tz)
+    return value.astimezone(tz)
+
+# День записи по UTC. Для колонки это выражение SQL (пересчёт итогов в базе),
+# для datetime — дата в Python (обновление итогов при записи), правило одно.
+# На PostgreSQL date() от timestamptz зависит от часового пояса сессии, поэтому
+# время сначала приводится к UTC; SQLite хранит время уже в UTC
+def utc_day(value, dialect: Optional[str] = None):
+    if isinstance(value, datetime):
+        return to_utc(value).date()
+    if dialect == "postgresql":
+        return func.date(func.timezone("UTC", value), type_=Date)
+    return func.date(value, type_=Date)